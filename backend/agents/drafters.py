@@ -1,7 +1,9 @@
 from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, ToolMessage
+from config import OLLAMA_KEEP_ALIVE
 from models.state import AgentState
 from services.settings_service import get_settings
+from services.llm_scheduler import get_scheduler, INTERACTIVE
 
 _llm: ChatOllama | None = None
 
@@ -11,7 +13,10 @@ def _get_llm() -> ChatOllama:
     if _llm is None:
         s = get_settings()
         _llm = ChatOllama(
-            model=s["model"], base_url=s["ollama_url"], temperature=s["temperature"]
+            model=s["model"],
+            base_url=s["ollama_url"],
+            temperature=s["temperature"],
+            keep_alive=OLLAMA_KEEP_ALIVE,
         )
     return _llm
 
@@ -27,9 +32,10 @@ Rules:
 - Be concise."""
 
 
-def drafter_node(state: AgentState) -> AgentState:
+async def drafter_node(state: AgentState) -> AgentState:
     """Synthesize tool results into a final response."""
     llm = _get_llm()
     messages = [SystemMessage(content=DRAFTER_SYSTEM)] + list(state["messages"])
-    response = llm.invoke(messages)
+    async with get_scheduler().slot(INTERACTIVE):
+        response = await llm.ainvoke(messages)
     return {"messages": [response]}
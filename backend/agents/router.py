@@ -1,14 +1,28 @@
+import asyncio
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+
+import numpy as np
 from langchain_ollama import ChatOllama
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from config import OLLAMA_KEEP_ALIVE
 from models.state import AgentState
 from services.settings_service import get_settings
-from services.document_service import search_documents
+from services.llm_scheduler import get_scheduler, INTERACTIVE
+from services.response_cache import context_fingerprint, get_response_cache, normalize
+from services.token_budget import estimate_tokens, truncate_to_tokens
+from services.document_service import search_documents, get_chunk_embeddings
+from services.chunk_selection import select_chunks
+from services import embedding_service
 from services.imessage_service import read_recent_messages
 from services.mail_service import read_recent_emails as _fetch_emails
 
-DOC_TOP_K = 15
+DOC_TOP_K = 12  # candidates for selection; merging and de-duplication trim these down
+
+# Context fetchers block (chat.db copy, AppleScript, embedding search), so they
+# run off the event loop in a small dedicated pool.
+_fetch_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="manasu-fetch")
 
 # --- tag parsing ----------------------------------------------------------
 
@@ -80,18 +94,41 @@ def _fetch_files_context(query: str) -> str:
         results = search_documents(query, top_k=DOC_TOP_K)
         if not results:
             return "No relevant document excerpts found."
-        parts = [f"[{r['filename']}]\n{r['content']}" for r in results]
+        embeddings = get_chunk_embeddings([r["id"] for r in results])
+        selected = select_chunks(results, embeddings, get_settings()["files_tokens"])
+        parts = [f"[{r['filename']}]\n{r['content']}" for r in selected]
         return "\n\n".join(parts)
     except Exception as e:
         return f"Document search failed: {e}"
 
 
-# --- system prompts -------------------------------------------------------
+def _embed_question(text: str) -> np.ndarray:
+    vec = np.asarray(embedding_service.embed([text])[0], dtype=np.float32)
+    return vec / (np.linalg.norm(vec) or 1.0)
+
+
+# --- prompts --------------------------------------------------------------
+#
+# Ollama reuses its KV cache for the longest unchanged prefix of the prompt,
+# so the layout goes from most to least stable: fixed instructions, rolling
+# summary, history, and only then this turn's volatile data (time, fetched
+# context) wrapped around the question.
+
+SYSTEM_PROMPT = """You are Manasu, a private AI assistant running locally on macOS.
+
+Answer the user's question directly and concisely.
+When a message includes data from the user's iMessages, emails or documents, use that data to answer."""
 
-def _build_tagged_system(tags: set[str], contexts: dict[str, str]) -> str:
-    now = datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
-    lines = [f"You are Manasu, a private AI assistant on macOS. Today is {now}.", ""]
 
+def _build_system(summary: str) -> str:
+    if not summary:
+        return SYSTEM_PROMPT
+    return f"{SYSTEM_PROMPT}\n\n=== Earlier in this conversation (summary) ===\n{summary}"
+
+
+def _build_turn(query: str, tags: set[str], contexts: dict[str, str]) -> str:
+    """The final user message: fetched context, current time, then the question."""
+    lines = []
     if "texts" in tags:
         lines += ["=== Recent iMessages ===", contexts.get("texts", ""), ""]
     if "emails" in tags:
@@ -99,15 +136,21 @@ def _build_tagged_system(tags: set[str], contexts: dict[str, str]) -> str:
     if "files" in tags:
         lines += ["=== Relevant Document Excerpts ===", contexts.get("files", ""), ""]
 
-    lines.append("Use the data above to answer the user's question. Be concise.")
+    now = datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
+    lines += [f"(It is now {now}.)", "", query]
     return "\n".join(lines)
 
 
-def _build_plain_system() -> str:
-    now = datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
-    return f"""You are Manasu, a private AI assistant running locally on macOS. Today is {now}.
-
-Answer the user's question directly and concisely."""
+def _budget_contexts(contexts: dict[str, str], max_tokens: int) -> dict[str, str]:
+    """Split the context budget across tags; short contexts give their slack to the rest."""
+    remaining = max_tokens
+    fitted: dict[str, str] = {}
+    by_size = sorted(contexts.items(), key=lambda kv: estimate_tokens(kv[1]))
+    for i, (tag, text) in enumerate(by_size):
+        share = remaining // (len(by_size) - i)
+        fitted[tag] = truncate_to_tokens(text, share)
+        remaining -= estimate_tokens(fitted[tag])
+    return fitted
 
 
 # --- LLM singleton --------------------------------------------------------
@@ -119,47 +162,70 @@ def _get_llm() -> ChatOllama:
     global _llm
     if _llm is None:
         s = get_settings()
-        _llm = ChatOllama(model=s["model"], base_url=s["ollama_url"], temperature=s["temperature"])
+        _llm = ChatOllama(
+            model=s["model"],
+            base_url=s["ollama_url"],
+            temperature=s["temperature"],
+            keep_alive=OLLAMA_KEEP_ALIVE,
+        )
     return _llm
 
 
 # --- node -----------------------------------------------------------------
 
-def router_node(state: AgentState) -> AgentState:
+async def _fetch_contexts(tags: set[str], query: str) -> dict[str, str]:
+    """Fetch context for each active tag concurrently."""
+    loop = asyncio.get_running_loop()
+    jobs: dict[str, asyncio.Future] = {}
+    if "texts" in tags:
+        jobs["texts"] = loop.run_in_executor(_fetch_executor, _fetch_texts_context)
+    if "emails" in tags:
+        jobs["emails"] = loop.run_in_executor(_fetch_executor, _fetch_emails_context)
+    if "files" in tags:
+        jobs["files"] = loop.run_in_executor(_fetch_executor, _fetch_files_context, query)
+    results = await asyncio.gather(*jobs.values())
+    return dict(zip(jobs.keys(), results))
+
+
+async def router_node(state: AgentState) -> AgentState:
     messages = list(state["messages"])
 
-    last_human = ""
-    for m in reversed(messages):
-        if isinstance(m, HumanMessage):
-            last_human = m.content or ""
+    last_idx, last_human = len(messages), ""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            last_idx, last_human = i, messages[i].content or ""
             break
 
     tags, clean_query = _parse_tags(last_human)
     llm = _get_llm()
+    settings = get_settings()
+    loop = asyncio.get_running_loop()
+
+    cache, cache_key, embed, query_vec = get_response_cache(), None, None, None
+    if not tags and settings["response_cache"] in ("exact", "semantic"):
+        context = context_fingerprint(messages[:last_idx], state.get("summary", ""))
+        cache_key = (settings["model"], settings["temperature"], context, normalize(last_human))
+        embed = _embed_question if settings["response_cache"] == "semantic" else None
+        cached, query_vec = await loop.run_in_executor(_fetch_executor, cache.get, cache_key, embed)
+        if cached is not None:
+            return {"messages": [AIMessage(content=cached)]}
 
-    if not tags:
-        system = _build_plain_system()
-        response = llm.invoke([SystemMessage(content=system)] + messages)
-        return {"messages": [response]}
-
-    # Fetch context for each active tag
     contexts: dict[str, str] = {}
-    if "texts" in tags:
-        contexts["texts"] = _fetch_texts_context()
-    if "emails" in tags:
-        contexts["emails"] = _fetch_emails_context()
-    if "files" in tags:
-        contexts["files"] = _fetch_files_context(clean_query or last_human)
-
-    system = _build_tagged_system(tags, contexts)
-
-    # Replace tagged message with clean query
-    clean_messages = []
-    for m in messages:
-        if isinstance(m, HumanMessage) and m.content == last_human:
-            clean_messages.append(HumanMessage(content=clean_query or last_human))
-        else:
-            clean_messages.append(m)
-
-    response = llm.invoke([SystemMessage(content=system)] + clean_messages)
+    if tags:
+        contexts = await _fetch_contexts(tags, clean_query or last_human)
+        budget = settings["context_tokens"] - estimate_tokens(SYSTEM_PROMPT)
+        contexts = _budget_contexts(contexts, max(budget, 0))
+
+    # History is left untouched so its prefix matches what Ollama already has cached
+    prompt = (
+        [SystemMessage(content=_build_system(state.get("summary", "")))]
+        + messages[:last_idx]
+        + [HumanMessage(content=_build_turn(clean_query or last_human, tags, contexts))]
+        + messages[last_idx + 1:]
+    )
+
+    async with get_scheduler().slot(INTERACTIVE):
+        response = await llm.ainvoke(prompt)
+    if cache_key and response.content:
+        await loop.run_in_executor(_fetch_executor, cache.put, cache_key, response.content, embed, query_vec)
     return {"messages": [response]}
@@ -0,0 +1,120 @@
+import asyncio
+
+from langchain_ollama import ChatOllama
+from langchain_core.messages import SystemMessage, HumanMessage
+
+from config import OLLAMA_KEEP_ALIVE, SUMMARY_MAX_WORDS, SUMMARY_MIN_MESSAGES
+from services.settings_service import get_settings
+from services.llm_scheduler import get_scheduler, BACKGROUND
+from services.token_budget import estimate_tokens, truncate_to_tokens
+from services.history_service import (
+    get_recent_messages,
+    get_messages_between,
+    get_summary,
+    set_summary,
+)
+
+SUMMARY_SYSTEM = f"""You maintain a running summary of a conversation between a user and Manasu, their assistant.
+
+You are given the current summary (possibly empty) and the next turns of the conversation.
+Return an updated summary that keeps every fact, name, number, decision and open question the user may refer back to.
+Write plain prose, no preamble, under {SUMMARY_MAX_WORDS} words."""
+
+_llm: ChatOllama | None = None
+
+
+def _get_llm() -> ChatOllama:
+    global _llm
+    if _llm is None:
+        s = get_settings()
+        _llm = ChatOllama(
+            model=s["model"], base_url=s["ollama_url"], temperature=0, keep_alive=OLLAMA_KEEP_ALIVE
+        )
+    return _llm
+
+
+# --- background scheduling ------------------------------------------------
+
+_tasks: set[asyncio.Task] = set()
+_running: set[str] = set()
+
+
+def schedule_summary(chat_id: str) -> None:
+    """Fold turns that fell out of the history window into the summary, off the request path."""
+    if chat_id in _running:
+        return
+    _running.add(chat_id)
+    task = asyncio.create_task(_summarize(chat_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _summarize(chat_id: str) -> None:
+    try:
+        await summarize_chat(chat_id)
+    except Exception:
+        # Best effort — the next turn will try again
+        pass
+    finally:
+        _running.discard(chat_id)
+
+
+def _batches(messages: list[dict], max_tokens: int) -> list[list[dict]]:
+    """Split messages, oldest first, into runs of at most max_tokens each; overlong messages are cut."""
+    batches: list[list[dict]] = []
+    current: list[dict] = []
+    used = 0
+    for m in messages:
+        content = truncate_to_tokens(m["content"], max_tokens)
+        tokens = estimate_tokens(content)
+        if current and used + tokens > max_tokens:
+            batches.append(current)
+            current, used = [], 0
+        current.append({**m, "content": content})
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def summarize_chat(chat_id: str) -> bool:
+    """
+    Summarize messages older than the current history window that the stored
+    summary doesn't cover yet. Returns True if the summary was updated.
+
+    A long backlog (a migrated chat, or a summarizer that fell behind) is
+    folded in over several calls of at most history_tokens/2 tokens of turns
+    each, and the summary is saved after each one, so no prompt outgrows the
+    model's context and an interrupted run keeps what it has done.
+    """
+    max_tokens = get_settings()["history_tokens"]
+    window = get_recent_messages(chat_id, max_tokens)
+    if not window:
+        return False
+
+    current = get_summary(chat_id) or {"summary": "", "covered_id": 0}
+    pending = get_messages_between(chat_id, current["covered_id"], window[0]["id"])
+    if len(pending) < SUMMARY_MIN_MESSAGES:
+        return False
+
+    summary = current["summary"]
+    updated = False
+    for batch in _batches(pending, max(max_tokens // 2, 1)):
+        turns = "\n".join(
+            f"{'User' if m['role'] == 'human' else 'Manasu'}: {m['content']}" for m in batch
+        )
+        prompt = (
+            f"Current summary:\n{summary or '(none yet)'}\n\n"
+            f"Next turns:\n{turns}"
+        )
+        async with get_scheduler().slot(BACKGROUND):
+            response = await _get_llm().ainvoke(
+                [SystemMessage(content=SUMMARY_SYSTEM), HumanMessage(content=prompt)]
+            )
+        text = (response.content or "").strip()
+        if not text:
+            break
+        summary = text
+        set_summary(chat_id, summary, batch[-1]["id"])
+        updated = True
+    return updated
@@ -0,0 +1,103 @@
+"""
+Chunker benchmark — fixed 500-character slicing vs the structure-aware chunker.
+
+Builds a fixture corpus of markdown documents (headings, paragraphs of filler
+sentences, and one planted fact per section), chunks it both ways, embeds the
+chunks with the shared MiniLM model and asks one question per fact. A hit is
+a top-k chunk that contains the fact's answer. Run from backend/:
+
+    python -m benchmarks.bench_chunking --docs 40 --top-k 3
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from services import embedding_service
+from services.extraction import chunk_text
+
+SUBJECTS = ["project Falcon", "the Lisbon office", "invoice batch", "the Q3 audit", "server rack",
+            "the Oslo lease", "vendor contract", "the spring offsite", "backup cluster", "the hiring plan"]
+FILLER = [
+    "The team reviewed the timeline and agreed to revisit it next week.",
+    "Several follow-up items were assigned during the meeting.",
+    "Costs were broadly in line with the previous quarter.",
+    "Feedback from stakeholders has been collected and summarized.",
+    "No blocking issues were raised at this stage.",
+    "Documentation will be updated once the changes are approved.",
+    "The schedule remains tight but achievable.",
+    "Risks were discussed and mitigation owners were named.",
+]
+
+
+def _legacy_chunk(text: str, size: int = 500, overlap: int = 50) -> list[str]:
+    chunks = []
+    start = 0
+    while start < len(text):
+        chunks.append(text[start:start + size])
+        start += size - overlap
+    return [c for c in chunks if c.strip()]
+
+
+def _corpus(n_docs: int, seed: int = 7) -> tuple[list[str], list[tuple[str, str]]]:
+    """Returns (documents, [(question, answer)])."""
+    rng = random.Random(seed)
+    docs, questions = [], []
+    for d in range(n_docs):
+        lines = [f"# Report {d}"]
+        for s in range(rng.randint(3, 6)):
+            subject = f"{rng.choice(SUBJECTS)} {d}-{s}"
+            code = str(rng.randint(10000, 99999))
+            lines.append(f"\n## {subject.title()}\n")
+            paragraphs = [" ".join(rng.choices(FILLER, k=rng.randint(3, 8))) for _ in range(rng.randint(2, 5))]
+            fact = f"The reference number for {subject} is {code}."
+            i = rng.randrange(len(paragraphs))
+            paragraphs[i] = f"{paragraphs[i]} {fact} {' '.join(rng.choices(FILLER, k=2))}"
+            lines.append("\n\n".join(paragraphs))
+            questions.append((f"What is the reference number for {subject}?", code))
+        docs.append("\n".join(lines))
+    return docs, questions
+
+
+def _unit_rows(vectors: list) -> np.ndarray:
+    m = np.asarray(vectors, dtype=np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def _evaluate(name: str, chunker, docs: list[str], questions: list[tuple[str, str]], q_vecs: np.ndarray, top_k: int) -> None:
+    start = time.perf_counter()
+    chunks = [c for doc in docs for c in chunker(doc)]
+    chunk_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vecs = _unit_rows(embedding_service.embed(chunks))
+    embed_s = time.perf_counter() - start
+
+    hits = 0
+    for (_, answer), q in zip(questions, q_vecs):
+        best = np.argsort(vecs @ q)[::-1][:top_k]
+        hits += any(answer in chunks[i] for i in best)
+
+    print(
+        f"{name:<10} chunks {len(chunks):6d}   chunk {chunk_s * 1000:8.1f} ms   "
+        f"embed {embed_s:7.2f} s   hit@{top_k} {hits / len(questions):6.1%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    docs, questions = _corpus(args.docs)
+    print(f"{len(docs)} documents, {sum(map(len, docs)) / 1e3:.0f}k chars, {len(questions)} questions")
+    q_vecs = _unit_rows(embedding_service.embed([q for q, _ in questions]))
+
+    _evaluate("fixed-500", _legacy_chunk, docs, questions, q_vecs, args.top_k)
+    _evaluate("structure", chunk_text, docs, questions, q_vecs, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Embedding throughput — torch vs ONNX Runtime vs int8 ONNX.
+
+Embeds realistic chunks (the chunking benchmark's markdown corpus, cut by the
+app's chunker) with each backend and thread count. It reports chunks/sec and
+how closely each backend's vectors agree with the torch baseline: the mean
+and worst cosine similarity per chunk, and the overlap of top-k neighbours for
+a set of queries. "baseline" is the old path: Chroma's
+SentenceTransformerEmbeddingFunction with default batching. Run from backend/:
+
+    python -m benchmarks.bench_embeddings --docs 40 --threads 1,4
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_chunking import _corpus
+from services.embedding_backends import BACKENDS, MODEL_NAME, load_backend
+from services.extraction import chunk_text
+
+
+def _baseline():
+    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+    return SentenceTransformerEmbeddingFunction(MODEL_NAME)
+
+
+def _unit_rows(vectors) -> np.ndarray:
+    m = np.asarray(vectors, dtype=np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def _run(model, chunks: list[str], queries: list[str], repeat: int) -> tuple[float, np.ndarray, np.ndarray]:
+    """Returns (chunks/sec, chunk vectors, query vectors)."""
+    model(chunks[:8])  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vecs = model(chunks)
+        best = min(best, time.perf_counter() - start)
+    return len(chunks) / best, _unit_rows(vecs), _unit_rows(model(queries))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--threads", default="0", help="comma-separated; 0 = runtime default")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    docs, questions = _corpus(args.docs)
+    chunks = [c for doc in docs for c in chunk_text(doc)]
+    queries = [q for q, _ in questions]
+    print(f"{len(chunks)} chunks, {len(queries)} queries, best of {args.repeat}")
+
+    rows = [("baseline", 0, _baseline)]
+    for name in args.backends.split(","):
+        for threads in (int(t) for t in args.threads.split(",")):
+            rows.append((name, threads, lambda name=name, threads=threads: load_backend(name, threads)))
+
+    reference = None
+    for name, threads, load in rows:
+        start = time.perf_counter()
+        model = load()
+        load_s = time.perf_counter() - start
+        rate, vecs, q_vecs = _run(model, chunks, queries, args.repeat)
+        if reference is None:
+            reference = (vecs, q_vecs, np.argsort(-(q_vecs @ vecs.T), axis=1)[:, :args.top_k])
+        ref_vecs, _, ref_top = reference
+        cosine = np.sum(vecs * ref_vecs, axis=1)
+        top = np.argsort(-(q_vecs @ vecs.T), axis=1)[:, :args.top_k]
+        overlap = np.mean([len(set(a) & set(b)) / args.top_k for a, b in zip(top, ref_top)])
+        print(
+            f"{name:<10} threads {threads or 'auto':>4}   load {load_s:6.2f} s   {rate:8.1f} chunks/s   "
+            f"cosine mean {cosine.mean():.5f} min {cosine.min():.5f}   top-{args.top_k} overlap {overlap:6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Chat history benchmark — legacy Chroma collections vs the SQLite store.
+
+Appends N messages spread over a handful of chats, then times loading one
+chat's full history. SQLite loads are timed with the in-memory history cache
+emptied, and again once cached. Run from backend/:
+
+    python -m benchmarks.bench_history --messages 10000 --chats 20
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+
+def _bench_chroma(root: Path, n_messages: int, n_chats: int, loads: int) -> dict:
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.PersistentClient(path=str(root / "chroma"), settings=Settings(anonymized_telemetry=False))
+    col = client.get_or_create_collection("chat_messages")
+    chat_ids = [str(uuid.uuid4()) for _ in range(n_chats)]
+
+    append = []
+    for i in range(n_messages):
+        t = time.perf_counter()
+        col.add(
+            ids=[str(uuid.uuid4())],
+            documents=[f"message {i} with some ordinary chat content"],
+            metadatas=[{
+                "chat_id": chat_ids[i % n_chats],
+                "role": "human" if i % 2 == 0 else "assistant",
+                "timestamp": datetime.utcnow().isoformat(),
+            }],
+        )
+        append.append(time.perf_counter() - t)
+
+    load = []
+    for i in range(loads):
+        t = time.perf_counter()
+        result = col.get(where={"chat_id": chat_ids[i % n_chats]})
+        msgs = sorted(
+            ({"content": d, **m} for d, m in zip(result["documents"], result["metadatas"])),
+            key=lambda x: x["timestamp"],
+        )
+        load.append(time.perf_counter() - t)
+    assert msgs
+    return {"append": append, "load": load}
+
+
+def _bench_sqlite(root: Path, n_messages: int, n_chats: int, loads: int) -> dict:
+    import config
+    config.HISTORY_DB_PATH = root / "history.db"
+    from services import history_service
+    history_service.HISTORY_DB_PATH = config.HISTORY_DB_PATH
+    history_service._migrate_from_chroma = lambda conn: None
+
+    chat_ids = [history_service.create_chat() for _ in range(n_chats)]
+
+    append = []
+    for i in range(n_messages):
+        t = time.perf_counter()
+        history_service.save_message(
+            chat_ids[i % n_chats],
+            "human" if i % 2 == 0 else "assistant",
+            f"message {i} with some ordinary chat content",
+        )
+        append.append(time.perf_counter() - t)
+
+    # "load" empties the in-memory LRU first so it times SQLite; "cached" is a
+    # repeat load served from the LRU
+    load, cached = [], []
+    for i in range(loads):
+        with history_service._lock:
+            history_service._cache.clear()
+        t = time.perf_counter()
+        msgs = history_service.get_chat_messages(chat_ids[i % n_chats])
+        load.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        history_service.get_chat_messages(chat_ids[i % n_chats])
+        cached.append(time.perf_counter() - t)
+    assert msgs
+    return {"append": append, "load": load, "cached": cached}
+
+
+def _report(name: str, result: dict) -> None:
+    for op, samples in result.items():
+        ms = sorted(s * 1000 for s in samples)
+        p95 = ms[int(len(ms) * 0.95) - 1] if len(ms) > 1 else ms[0]
+        print(f"{name:<8} {op:<7} mean {statistics.mean(ms):8.3f} ms   p50 {statistics.median(ms):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--loads", type=int, default=50)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        print(f"{args.messages} messages across {args.chats} chats\n")
+        _report("sqlite", _bench_sqlite(root, args.messages, args.chats, args.loads))
+        if not args.skip_chroma:
+            _report("chroma", _bench_chroma(root, args.messages, args.chats, args.loads))
+
+
+if __name__ == "__main__":
+    main()
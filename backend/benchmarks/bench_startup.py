@@ -0,0 +1,84 @@
+"""
+Backend startup time — eager vs lazy embedding model.
+
+Launches the backend in a subprocess and polls /health. "eager" loads the
+MiniLM model before serving, as document_service used to at import time;
+"lazy" is the current startup, where the model warms in the background.
+Reports time until /health first answers and until it reports the embedding
+model ready. Run from backend/:
+
+    python -m benchmarks.bench_startup --runs 3
+"""
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+EAGER = (
+    "import sys, uvicorn; from services import embedding_service; "
+    "embedding_service.warmup(); import main; "
+    "uvicorn.run(main.app, host='127.0.0.1', port=int(sys.argv[1]), log_level='warning')"
+)
+LAZY = (
+    "import sys, uvicorn, main; "
+    "uvicorn.run(main.app, host='127.0.0.1', port=int(sys.argv[1]), log_level='warning')"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _run(script: str, timeout: float) -> tuple[float, float]:
+    """Returns (seconds until /health answers, seconds until embeddings are ready)."""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", script, str(port)], stderr=subprocess.DEVNULL)
+    health = ready = None
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while ready is None and time.perf_counter() - start < timeout:
+                try:
+                    body = client.get(f"http://127.0.0.1:{port}/health").json()
+                except httpx.HTTPError:
+                    time.sleep(0.02)
+                    continue
+                now = time.perf_counter() - start
+                if health is None:
+                    health = now
+                embeddings = body.get("embeddings", {})
+                if embeddings.get("status") == "error":
+                    raise RuntimeError(f"embedding model failed to load: {embeddings.get('error')}")
+                if embeddings.get("ready"):
+                    ready = now
+                else:
+                    time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait()
+    if health is None or ready is None:
+        raise RuntimeError(f"backend did not become ready within {timeout:.0f}s")
+    return health, ready
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    for name, script in (("eager", EAGER), ("lazy", LAZY)):
+        results = [_run(script, args.timeout) for _ in range(args.runs)]
+        health = statistics.median(h for h, _ in results)
+        ready = statistics.median(r for _, r in results)
+        print(f"{name:<6} /health answers: {health * 1000:8.1f} ms   embeddings ready: {ready * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Time-to-first-token on turn N of a long conversation, old vs new prompt layout.
+
+"legacy" rebuilds the prompt the way the router used to: the current time in
+the first line of the system prompt and a history window that slides every
+turn, so Ollama has to re-prefill everything. "stable" uses the current
+router layout: fixed system prompt, the checkpointed history window from
+history_service (on a throwaway history database), volatile data in the last
+message. Needs a running Ollama. Run from backend/:
+
+    python -m benchmarks.bench_ttft --turns 40
+"""
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+from agents.router import _build_system, _build_turn
+from config import OLLAMA_KEEP_ALIVE
+from services.settings_service import get_settings
+from services.token_budget import estimate_tokens
+
+FILLER = (
+    "Here is a fairly detailed answer that mentions a few names, dates and numbers "
+    "so the conversation history has realistic weight. "
+) * 4
+
+
+def _legacy_prompt(turns: list[tuple[str, str]], question: str, turn: int, budget: int) -> list[dict]:
+    # Time moves on every turn, as it does in real use
+    now = (datetime.now() + timedelta(minutes=turn)).strftime("%A, %B %d, %Y at %I:%M %p")
+    system = f"""You are Manasu, a private AI assistant running locally on macOS. Today is {now}.
+
+Answer the user's question directly and concisely."""
+    history: list[dict] = []
+    used = 0
+    for q, a in reversed(turns):
+        used += estimate_tokens(q) + estimate_tokens(a)
+        if used > budget:
+            break
+        history[:0] = [{"role": "user", "content": q}, {"role": "assistant", "content": a}]
+    return [{"role": "system", "content": system}, *history, {"role": "user", "content": question}]
+
+
+def _use_temp_history(root: Path):
+    """Point history_service at an empty database under root and return it."""
+    import config
+    config.HISTORY_DB_PATH = root / "history.db"
+    from services import history_service
+    history_service.HISTORY_DB_PATH = config.HISTORY_DB_PATH
+    history_service._migrate_from_chroma = lambda conn: None
+    return history_service
+
+
+def _stable_prompt(history_service, chat_id: str, question: str, budget: int) -> list[dict]:
+    # The window stream_chat loads once the rolling summary has caught up
+    window = history_service.get_recent_messages(chat_id, budget)
+    history = [{"role": "user" if m["role"] == "human" else "assistant", "content": m["content"]} for m in window]
+    return [
+        {"role": "system", "content": _build_system("")},
+        *history,
+        {"role": "user", "content": _build_turn(question, set(), {})},
+    ]
+
+
+def _ttft(client: httpx.Client, url: str, model: str, messages: list[dict]) -> tuple[float, int]:
+    """Returns (seconds to first token, prompt tokens Ollama actually evaluated)."""
+    start = time.perf_counter()
+    first = None
+    evaluated = 0
+    body = {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {"num_predict": 8, "temperature": 0},
+    }
+    with client.stream("POST", f"{url}/api/chat", json=body) as resp:
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if first is None and chunk.get("message", {}).get("content"):
+                first = time.perf_counter() - start
+            if chunk.get("done"):
+                evaluated = chunk.get("prompt_eval_count", 0)
+    return first or (time.perf_counter() - start), evaluated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--history-tokens", type=int, default=get_settings()["history_tokens"])
+    parser.add_argument("--last", type=int, default=10, help="average over the last K turns")
+    args = parser.parse_args()
+
+    s = get_settings()
+    turns = [(f"Question {i}: what did we decide about item {i}?", f"Answer {i}. {FILLER}") for i in range(args.turns)]
+
+    with tempfile.TemporaryDirectory() as tmp, httpx.Client(timeout=300.0) as client:
+        history_service = _use_temp_history(Path(tmp))
+        chat_id = history_service.create_chat()
+        for name in ("legacy", "stable"):
+            ttfts, evals = [], []
+            for n in range(1, args.turns + 1):
+                question = f"Follow-up {n}: summarize item {n - 1} in one line."
+                if name == "legacy":
+                    messages = _legacy_prompt(turns[: n - 1], question, n, args.history_tokens)
+                else:
+                    if n > 1:
+                        history_service.save_message(chat_id, "human", turns[n - 2][0])
+                        history_service.save_message(chat_id, "assistant", turns[n - 2][1])
+                    messages = _stable_prompt(history_service, chat_id, question, args.history_tokens)
+                t, ev = _ttft(client, s["ollama_url"], s["model"], messages)
+                ttfts.append(t)
+                evals.append(ev)
+            tail = slice(-args.last, None)
+            print(
+                f"{name:<7} turn {args.turns}: ttft {ttfts[-1] * 1000:7.1f} ms   "
+                f"mean last {args.last}: {sum(ttfts[tail]) / len(ttfts[tail]) * 1000:7.1f} ms   "
+                f"prompt tokens evaluated (mean last {args.last}): {sum(evals[tail]) / len(evals[tail]):6.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
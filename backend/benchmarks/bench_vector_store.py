@@ -0,0 +1,157 @@
+"""
+Vector store benchmark — Chroma vs the memory-mapped flat index.
+
+Builds each store from the same synthetic corpus of clustered, unit-length
+384-d vectors (MiniLM-shaped; no model needed), then measures every store in
+a fresh subprocess so cold start and memory are not shared between them:
+
+- cold start: import + open + first query answered
+- recall@k against exact float32 search, and p50 / p95 query latency
+- peak RSS of that subprocess, and the bytes the store occupies on disk
+
+Run from backend/:
+
+    python -m benchmarks.bench_vector_store --n 200000 --queries 200
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKENDS = ("chroma", "flat", "flat-int8")
+DIM = 384
+BUILD_BATCH = 4096
+
+
+def _corpus(n: int, queries: int, seed: int = 7) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, n // 500), DIM)).astype(np.float32)
+    corpus = centers[rng.integers(len(centers), size=n)] + 0.6 * rng.standard_normal((n, DIM)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    picks = rng.integers(n, size=queries)
+    q = corpus[picks] + 0.3 * rng.standard_normal((queries, DIM)).astype(np.float32)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    return corpus, q
+
+
+def _open(backend: str, directory: Path, create: bool = False):
+    if backend == "chroma":
+        import chromadb
+        from chromadb.config import Settings
+
+        from services.vector_store import ChromaStore
+
+        client = chromadb.PersistentClient(path=str(directory / "chroma"), settings=Settings(anonymized_telemetry=False))
+        if create:
+            collection = client.get_or_create_collection("documents", embedding_function=None)
+        else:
+            collection = client.get_collection("documents", embedding_function=None)
+        return ChromaStore(client, collection)
+
+    from services.flat_index import FlatIndex
+
+    dtype = "int8" if backend == "flat-int8" else "float16"
+    return FlatIndex(directory / backend, dtype=dtype, name=backend)
+
+
+def _build(backend: str, directory: Path, corpus: np.ndarray) -> float:
+    start = time.perf_counter()
+    store = _open(backend, directory, create=True)
+    batch = min(BUILD_BATCH, store.max_batch_size())
+    for i in range(0, len(corpus), batch):
+        rows = corpus[i:i + batch]
+        ids = [f"c-{j}" for j in range(i, i + len(rows))]
+        store.upsert(ids, rows.tolist(), [""] * len(rows), [{"i": j} for j in range(i, i + len(rows))])
+    return time.perf_counter() - start
+
+
+def _disk_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _peak_rss() -> int:
+    """Peak RSS of this process in bytes."""
+    # Linux carries ru_maxrss over from the parent across exec; VmHWM starts afresh
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _measure(backend: str, directory: Path, top_k: int) -> dict:
+    """Runs in its own process. Prints one JSON line of results."""
+    start = time.perf_counter()
+    store = _open(backend, directory)
+    queries = np.load(directory / "queries.npy")
+    store.query(queries[0].tolist(), top_k)
+    cold_start = time.perf_counter() - start
+
+    truth = np.load(directory / "truth.npy")
+    latencies, recall = [], 0.0
+    for q, expected in zip(queries, truth):
+        t = time.perf_counter()
+        got = store.query(q.tolist(), top_k)
+        latencies.append(time.perf_counter() - t)
+        recall += len({int(i[2:]) for i in got} & set(expected.tolist())) / top_k
+
+    latencies.sort()
+    return {
+        "cold_start_s": cold_start,
+        "recall": recall / len(queries),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "peak_rss_mb": _peak_rss() / 2**20,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(_measure(args.measure, Path(args.dir), args.top_k)))
+        return
+
+    corpus, queries = _corpus(args.n, args.queries)
+    truth = np.stack([np.argsort(-(corpus @ q))[:args.top_k] for q in queries])
+    print(f"{args.n} vectors x {DIM}, {args.queries} queries, recall@{args.top_k} vs exact float32")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        np.save(directory / "queries.npy", queries)
+        np.save(directory / "truth.npy", truth)
+        for backend in args.backends.split(","):
+            build_s = _build(backend, directory, corpus)
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_vector_store", "--measure", backend,
+                 "--dir", tmp, "--top-k", str(args.top_k)],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            r = json.loads(out)
+            disk = _disk_bytes(directory / backend)
+            print(
+                f"{backend:<10} build {build_s:7.1f} s   cold start {r['cold_start_s'] * 1000:8.1f} ms   "
+                f"recall {r['recall']:6.1%}   p50 {r['p50_ms']:7.2f} ms   p95 {r['p95_ms']:7.2f} ms   "
+                f"peak RSS {r['peak_rss_mb']:7.1f} MB   disk {disk / 2**20:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -13,16 +13,40 @@ TEMP_DB_PATH = TEMP_DIR / "chat.db"
 # Ollama
 OLLAMA_URL = "http://localhost:11434"
 MODEL = "llama3.2"
+OLLAMA_KEEP_ALIVE = "30m"  # keep the model (and its prompt cache) loaded between turns
+LLM_MAX_CONCURRENCY = 1  # calls sent to Ollama at once; match OLLAMA_NUM_PARALLEL
+LLM_MAX_QUEUE = 8  # waiting calls before new ones are rejected
+
+# Response cache (untagged questions, opt-in via settings)
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 6 * 60 * 60  # seconds
+RESPONSE_CACHE_THRESHOLD = 0.95  # cosine similarity for a semantic hit
 
 # ChromaDB
 CHROMA_DIR = Path.home() / ".manasu" / "chroma"
+FLAT_INDEX_DIR = Path.home() / ".manasu" / "flat_index"  # vector_store = "flat" / "flat-int8"
+CATALOG_DB_PATH = Path.home() / ".manasu" / "documents.db"  # folder-sync manifest, jobs
+UPLOADS_DIR = Path.home() / ".manasu" / "uploads"  # uploads waiting to be ingested
+SEARCH_EMBED_CACHE_SIZE = 512  # query embeddings kept for repeated searches
+SEARCH_RESULT_CACHE_SIZE = 128
+SEARCH_RESULT_CACHE_TTL = 5 * 60  # seconds
+
+# Chat history
+HISTORY_DB_PATH = Path.home() / ".manasu" / "history.db"
+HISTORY_CACHE_CHATS = 32  # conversations kept in memory for prompt building
+SUMMARY_MIN_MESSAGES = 4  # dropped turns to accumulate before re-summarizing; they stay in the window meanwhile
+SUMMARY_MAX_WORDS = 250
 
 # Fine-tuning
 ADAPTERS_DIR = Path.home() / ".manasu" / "adapters"
 DATASETS_DIR = Path.home() / ".manasu" / "datasets"
 
+# Embedding models derived locally (e.g. the int8-quantized ONNX MiniLM)
+MODELS_DIR = Path.home() / ".manasu" / "models"
+
 # Ensure dirs exist
 TEMP_DIR.mkdir(parents=True, exist_ok=True)
 CHROMA_DIR.mkdir(parents=True, exist_ok=True)
+UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 ADAPTERS_DIR.mkdir(parents=True, exist_ok=True)
 DATASETS_DIR.mkdir(parents=True, exist_ok=True)
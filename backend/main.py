@@ -7,22 +7,32 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, ToolMessage
 
 from agents.supervisor import get_graph
+from agents.summarizer import schedule_summary
 from services.settings_service import get_settings, update_settings
-from services.chroma_service import (
+from services.history_service import (
     create_chat,
     save_message,
     get_chat_messages,
+    get_recent_messages,
+    get_session,
+    get_summary,
     list_sessions,
     delete_session,
     update_session_title,
 )
-from services.ollama_service import check_ollama_health
+from services.ollama_service import check_ollama_health, preload_model
+from services.llm_scheduler import get_scheduler
+from services.response_cache import get_response_cache, MODES as RESPONSE_CACHE_MODES
+from services.search_cache import get_search_cache
+from services.vector_store import BACKENDS as VECTOR_STORES
+from services.embedding_backends import BACKENDS as EMBEDDING_BACKENDS
+from services import embedding_service
 from services.imessage_service import is_imessage_available
 from services.mail_service import is_mail_available
-from services import document_service
+from services import catalog_service, document_service
 
 app = FastAPI(title="Manasu Backend", version="1.0.0")
 
@@ -35,6 +45,55 @@ app.add_middleware(
 )
 
 
+_background: set[asyncio.Task] = set()
+
+
+def _in_background(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+@app.on_event("startup")
+async def warm_model():
+    # Don't hold up startup if Ollama is slow or not running yet
+    _in_background(preload_model())
+
+
+@app.on_event("startup")
+async def warm_embeddings():
+    # The embedding model loads lazily; warm it off the startup path so /health answers immediately
+    _in_background(asyncio.to_thread(embedding_service.warmup))
+
+
+@app.on_event("startup")
+async def recover_jobs():
+    catalog_service.mark_interrupted_jobs()
+    # Uploads left behind by jobs the restart interrupted; nothing will ingest them now
+    for leftover in UPLOADS_DIR.iterdir():
+        if leftover.is_dir():
+            shutil.rmtree(leftover, ignore_errors=True)
+        else:
+            leftover.unlink(missing_ok=True)
+
+
+@app.on_event("startup")
+async def prepare_vector_store():
+    # Opening the store loads its index, and catching it up can take a while
+    _in_background(asyncio.to_thread(_sync_vector_store, True))
+
+
+@app.on_event("startup")
+async def start_watchers():
+    # Setting up recursive watches walks each folder, so keep it off the startup path
+    _in_background(asyncio.to_thread(watch_service.start))
+
+
+@app.on_event("shutdown")
+async def stop_watchers():
+    watch_service.stop()
+
+
 # ── Request / Response models ──────────────────────────────────────────────
 
 class ChatRequest(BaseModel):
@@ -48,11 +107,108 @@ class NewChatRequest(BaseModel):
 
 # ── Chat endpoint (SSE streaming) ──────────────────────────────────────────
 
-async def stream_chat(chat_id: str, user_message: str) -> AsyncGenerator[str, None]:
+# chat_id -> task currently generating an answer for that chat
+_generations: dict[str, asyncio.Task] = {}
+# Frames a generation may run ahead of its client. Once they are unsent,
+# generation waits, so a slow reader throttles how fast Ollama is pulled.
+STREAM_BUFFER_FRAMES = 32
+# How long a new message waits for the answer it preempts to save its partial
+# turn before going ahead regardless.
+PREEMPT_TIMEOUT = 5.0
+
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _save_turn(chat_id: str, user_message: str, response: str) -> None:
+    save_message(chat_id, "assistant", response)
+    # Auto-title the chat from first user message
+    session = get_session(chat_id)
+    if session and session["title"] == "New Chat":
+        title = user_message[:40] + ("…" if len(user_message) > 40 else "")
+        update_session_title(chat_id, title)
+
+
+async def _finish_turn(chat_id: str, user_message: str, response: str) -> None:
+    # Shielded so that a second cancel can't interrupt the save half way;
+    # the write runs on a worker thread either way.
+    await asyncio.shield(asyncio.to_thread(_save_turn, chat_id, user_message, response))
+    schedule_summary(chat_id)
+
+
+def _close_stream(out: asyncio.Queue, frame: str) -> None:
+    """
+    Push a final frame and the closing None without waiting. If the reader is
+    behind or gone, the oldest unsent frames are dropped to make room, so a
+    cancelled generation never blocks on its queue.
+    """
+    for item in (frame, None):
+        while out.full():
+            out.get_nowait()
+        out.put_nowait(item)
+
+
+async def _generate(chat_id: str, user_message: str, state: dict, out: asyncio.Queue) -> None:
+    """
+    Run the graph and push SSE frames to out, ending with None. out is bounded,
+    so generation pauses while the client is behind.
+    If cancelled, whatever was generated so far is saved as the assistant turn
+    (nothing is saved if no token arrived) and a 'cancelled' frame is sent.
+    """
     graph = get_graph()
+    full_response = ""
+
+    try:
+        # stream_mode="messages" surfaces each chunk as Ollama emits it
+        async for chunk, _meta in graph.astream(state, stream_mode="messages"):
+            # Tool call status
+            if isinstance(chunk, AIMessageChunk) and chunk.tool_call_chunks:
+                for tc in chunk.tool_call_chunks:
+                    if tc.get("name"):
+                        status_msg = f"Using tool: {tc['name']}…"
+                        await out.put(_sse({'type': 'status', 'content': status_msg}))
+
+            # Tool results
+            elif isinstance(chunk, ToolMessage):
+                await out.put(_sse({'type': 'status', 'content': 'Processing results…'}))
+
+            # Response tokens
+            elif isinstance(chunk, AIMessage) and chunk.content:
+                full_response += chunk.content
+                await out.put(_sse({'type': 'token', 'content': chunk.content}))
+
+    except asyncio.CancelledError:
+        _close_stream(out, _sse({'type': 'cancelled', 'chat_id': chat_id}))
+        if full_response:
+            await _finish_turn(chat_id, user_message, full_response)
+        raise
+    except Exception as e:
+        await out.put(_sse({'type': 'error', 'content': str(e)}))
+        await out.put(None)
+        return
+
+    if full_response:
+        await _finish_turn(chat_id, user_message, full_response)
+
+    await out.put(_sse({'type': 'done', 'chat_id': chat_id}))
+    await out.put(None)
 
-    # Load history from ChromaDB
-    history = get_chat_messages(chat_id)
+
+async def stream_chat(chat_id: str, user_message: str) -> AsyncGenerator[str, None]:
+    # A new message on the same chat preempts the answer still being generated.
+    # Wait for it to wind down so its partial answer is saved before our turn,
+    # but not indefinitely.
+    previous = _generations.get(chat_id)
+    if previous and not previous.done():
+        previous.cancel()
+        await asyncio.wait({previous}, timeout=PREEMPT_TIMEOUT)
+
+    # Load the newest turns that fit the history budget, plus any that fell out
+    # of it but aren't in the rolling summary yet
+    summary = get_summary(chat_id)
+    covered_id = summary["covered_id"] if summary else 0
+    history = get_recent_messages(chat_id, get_settings()["history_tokens"], keep_after=covered_id)
     lc_messages = []
     for msg in history:
         if msg["role"] == "human":
@@ -63,60 +219,44 @@ async def stream_chat(chat_id: str, user_message: str) -> AsyncGenerator[str, No
     lc_messages.append(HumanMessage(content=user_message))
     save_message(chat_id, "human", user_message)
 
-    state = {"messages": lc_messages, "chat_id": chat_id, "next": ""}
+    # Turns that fell out of the window are carried by the rolling summary
+    state = {
+        "messages": lc_messages,
+        "chat_id": chat_id,
+        "summary": summary["summary"] if summary else "",
+        "next": "",
+    }
 
-    full_response = ""
-    tool_used = False
+    out: asyncio.Queue[str | None] = asyncio.Queue(maxsize=STREAM_BUFFER_FRAMES)
+    task = asyncio.create_task(_generate(chat_id, user_message, state, out))
+    _generations[chat_id] = task
 
     try:
-        async for event in graph.astream(state, stream_mode="values"):
-            messages = event.get("messages", [])
-            if not messages:
-                continue
-
-            last = messages[-1]
-
-            # Tool call status
-            if isinstance(last, AIMessage) and last.tool_calls:
-                for tc in last.tool_calls:
-                    status_msg = f"Using tool: {tc['name']}…"
-                    yield f"data: {json.dumps({'type': 'status', 'content': status_msg})}\n\n"
-                tool_used = True
-
-            # Tool results
-            elif isinstance(last, ToolMessage):
-                yield f"data: {json.dumps({'type': 'status', 'content': 'Processing results…'})}\n\n"
-
-            # Final AI response
-            elif isinstance(last, AIMessage) and last.content and not last.tool_calls:
-                content = last.content
-                full_response = content
-                # Stream token by token (word chunks for responsiveness)
-                words = content.split(" ")
-                for i, word in enumerate(words):
-                    chunk = word + (" " if i < len(words) - 1 else "")
-                    yield f"data: {json.dumps({'type': 'token', 'content': chunk})}\n\n"
-                    await asyncio.sleep(0.01)
-
-    except Exception as e:
-        yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
-        return
-
-    if full_response:
-        save_message(chat_id, "assistant", full_response)
-        # Auto-title the chat from first user message
-        sessions = list_sessions()
-        for s in sessions:
-            if s["chat_id"] == chat_id and s["title"] == "New Chat":
-                title = user_message[:40] + ("…" if len(user_message) > 40 else "")
-                update_session_title(chat_id, title)
+        while True:
+            frame = await out.get()
+            if frame is None:
                 break
-
-    yield f"data: {json.dumps({'type': 'done', 'chat_id': chat_id})}\n\n"
+            yield frame
+    finally:
+        # Client disconnected — cancelling the task closes the HTTP request to
+        # Ollama so it stops generating. Nobody reads out any more, so empty it
+        # to leave room for the task's closing frames.
+        task.cancel()
+        while not out.empty():
+            out.get_nowait()
+        if _generations.get(chat_id) is task:
+            del _generations[chat_id]
 
 
 @app.post("/chat")
 async def chat(req: ChatRequest):
+    if get_scheduler().is_full():
+        raise HTTPException(
+            status_code=503,
+            detail="The model is busy — too many requests are queued. Try again shortly.",
+            headers={"Retry-After": "5"},
+        )
+
     # Create new session if needed
     if not req.chat_id:
         chat_id = create_chat()
@@ -135,26 +275,79 @@ async def chat(req: ChatRequest):
 
 # ── WebSocket endpoint ─────────────────────────────────────────────────────
 
+WS_MAX_STREAMS = 8
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Multiplexed chat streams over one socket.
+
+    Client frames carry an "id" chosen by the client:
+      {"id": "a", "chat_id": "...", "message": "..."}   start a stream
+      {"id": "a", "type": "cancel"}                      stop stream "a"
+    Every server frame echoes the "id" it belongs to; a stream ends with "done",
+    "error" or "cancelled". Streams run concurrently but share the socket, so
+    backpressure is per socket, not per stream: each stream buffers at most
+    STREAM_BUFFER_FRAMES unsent frames and then waits for its turn to send, and
+    a client that reads slowly slows every stream on that socket. Reusing a
+    live id cancels that stream first; frames without an id share the id "".
+    """
     await websocket.accept()
-    try:
-        while True:
-            data = await websocket.receive_json()
-            chat_id = data.get("chat_id") or create_chat()
-            message = data.get("message", "")
+    streams: dict[str, asyncio.Task] = {}
+    send_lock = asyncio.Lock()
 
+    async def send(payload: dict) -> None:
+        async with send_lock:
+            await websocket.send_json(payload)
+
+    async def forward(stream_id: str, chat_id: str, message: str) -> None:
+        try:
             async for chunk in stream_chat(chat_id, message):
                 # Strip "data: " prefix for WS
                 payload = chunk.strip()
                 if payload.startswith("data: "):
                     payload = payload[6:]
-                await websocket.send_text(payload)
+                await send({"id": stream_id, **json.loads(payload)})
+        except (WebSocketDisconnect, RuntimeError):
+            pass  # socket closed mid-stream; the receive loop handles it
+        finally:
+            if streams.get(stream_id) is asyncio.current_task():
+                del streams[stream_id]
+
+    async def stop(stream_id: str) -> None:
+        task = streams.pop(stream_id, None)
+        if task and not task.done():
+            task.cancel()
+            await asyncio.wait({task})
+            await send({"id": stream_id, "type": "cancelled"})
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+            stream_id = str(data.get("id", ""))
+            await stop(stream_id)
+            if data.get("type") == "cancel":
+                continue
+
+            if get_scheduler().is_full():
+                await send({"id": stream_id, "type": "error", "content": "The model is busy — too many requests are queued."})
+                continue
+            if len(streams) >= WS_MAX_STREAMS:
+                await send({"id": stream_id, "type": "error", "content": "Too many concurrent streams"})
+                continue
+
+            chat_id = data.get("chat_id") or create_chat()
+            message = data.get("message", "")
+            streams[stream_id] = asyncio.create_task(forward(stream_id, chat_id, message))
 
     except WebSocketDisconnect:
         pass
     except Exception as e:
         await websocket.send_json({"type": "error", "content": str(e)})
+    finally:
+        for task in streams.values():
+            task.cancel()
 
 
 # ── History endpoints ──────────────────────────────────────────────────────
@@ -188,12 +381,20 @@ async def connectors_status():
     ollama = await check_ollama_health()
     imessage = is_imessage_available()
     mail = is_mail_available()
-    docs = document_service.list_documents()
+    indexed, chunks = await asyncio.gather(
+        asyncio.to_thread(document_service.count_documents),
+        asyncio.to_thread(document_service.chunk_stats),
+    )
     return {
         "ollama": ollama,
         "imessage": imessage,
         "mail": mail,
-        "documents": {"indexed": len(docs), "available": True},
+        "documents": {
+            "indexed": indexed,
+            "available": True,
+            "chunks": chunks,
+        },
+        "embeddings": embedding_service.status(),
         "model": ollama.get("model", "llama3.2"),
     }
 
@@ -202,8 +403,14 @@ async def connectors_status():
 
 import tempfile
 import os
+import shutil
 import threading
 import queue
+from pathlib import Path
+
+from config import UPLOADS_DIR
+from services import job_service, watch_service
+from services.extraction import SUPPORTED_EXTENSIONS
 
 from training import data_collector, mlx_trainer, gguf_converter
 
@@ -211,51 +418,161 @@ class FolderSyncRequest(BaseModel):
     folder_path: str
 
 
-@app.post("/documents/upload")
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+@app.post("/documents/upload", status_code=202)
 async def upload_document(file: UploadFile = File(...)):
-    suffix = os.path.splitext(file.filename or "")[1].lower()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    """Stream the upload to disk and queue it for ingestion. Returns the job."""
+    filename = os.path.basename(file.filename or "")
+    suffix = os.path.splitext(filename)[1].lower()
+    if suffix not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
+
+    # Keep the original name so it shows up as the document's filename
+    upload_dir = Path(tempfile.mkdtemp(dir=UPLOADS_DIR))
+    dest = upload_dir / filename
     try:
-        result = document_service.ingest_file(tmp_path)
-        # Rename stored filepath to original name in metadata (already set via ingest_file)
-        result["filename"] = file.filename
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        os.unlink(tmp_path)
+        out = await asyncio.to_thread(open, dest, "wb")
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await asyncio.to_thread(out.write, chunk)
+        finally:
+            await asyncio.to_thread(out.close)
+    except BaseException:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        raise
+
+    def run(on_progress, cancel):
+        return document_service.ingest_file(dest, on_progress=on_progress, cancel=cancel)
+
+    # The upload is removed when the job ends, even if it is cancelled before it starts
+    return await asyncio.to_thread(
+        job_service.submit, "upload", filename, run, lambda: shutil.rmtree(upload_dir, ignore_errors=True)
+    )
+
+
+def _sync_vector_store(only_if_needed: bool = False) -> None:
+    """Queue a job that brings the vector_store setting's store in line with the catalog."""
+    if only_if_needed and not document_service.vector_store_needs_sync():
+        return
+    job_service.submit("vector_store", get_settings()["vector_store"], document_service.sync_vector_store)
 
 
 @app.get("/documents")
 async def get_documents():
-    return document_service.list_documents()
+    # Catalog reads and writes go through a thread: they can wait on an ingest's write lock
+    return await asyncio.to_thread(document_service.list_documents)
+
+
+@app.get("/documents/search-cache")
+async def search_cache_stats():
+    """Hit/miss counters for the query embedding and search result caches."""
+    return {"collection_version": document_service.collection_version(), **get_search_cache().stats()}
 
 
 @app.delete("/documents/{doc_id}")
 async def delete_document(doc_id: str):
-    deleted = document_service.delete_document(doc_id)
+    deleted = await asyncio.to_thread(document_service.delete_document, doc_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Document not found")
     return {"status": "deleted", "doc_id": doc_id}
 
 
-@app.post("/documents/sync-folder")
+@app.post("/documents/sync-folder", status_code=202)
 async def sync_folder(req: FolderSyncRequest):
+    """Queue an incremental sync of folder_path. Returns the job."""
+    folder = Path(req.folder_path).expanduser()
+    if not folder.is_dir():
+        raise HTTPException(status_code=400, detail=f"Not a directory: {folder}")
+
+    def run(on_progress, cancel):
+        return document_service.ingest_folder(folder, on_progress=on_progress, cancel=cancel)
+
+    return await asyncio.to_thread(job_service.submit, "sync", str(folder), run)
+
+
+@app.get("/watch-folders")
+async def get_watch_folders():
+    return {"folders": await asyncio.to_thread(watch_service.list_folders), "stats": watch_service.stats()}
+
+
+@app.post("/watch-folders", status_code=202)
+async def add_watch_folder(req: FolderSyncRequest):
+    """Keep folder_path in sync as files change. Queues a full sync now; returns {folder, job}."""
     try:
-        return document_service.ingest_folder(req.folder_path)
+        return await asyncio.to_thread(watch_service.add_folder, req.folder_path)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.delete("/watch-folders")
+async def remove_watch_folder(path: str):
+    """Stop watching a folder. Documents already indexed from it are kept."""
+    if not await asyncio.to_thread(watch_service.remove_folder, path):
+        raise HTTPException(status_code=404, detail="Folder is not being watched")
+    return {"status": "removed", "folder": path}
+
+
+# ── Ingestion jobs ─────────────────────────────────────────────────────────
+
+@app.get("/jobs")
+async def get_jobs():
+    return await asyncio.to_thread(job_service.list_jobs)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_service.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    if not job_service.cancel_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found or already finished")
+    return {"status": "cancelling", "job_id": job_id}
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """SSE stream of a job's progress — a snapshot first, then live updates until it finishes."""
+    events = job_service.subscribe(job_id)
+    if events is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            job_service.unsubscribe(job_id, events)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ── Settings ───────────────────────────────────────────────────────────────
 
 class SettingsRequest(BaseModel):
     temperature: float | None = None
     model: str | None = None
     ollama_url: str | None = None
+    history_tokens: int | None = None
+    context_tokens: int | None = None
+    files_tokens: int | None = None
+    response_cache: str | None = None
+    vector_store: str | None = None
+    embedding_backend: str | None = None
+    embedding_threads: int | None = None
 
 
 @app.get("/settings")
@@ -266,7 +583,25 @@ async def get_settings_endpoint():
 @app.post("/settings")
 async def update_settings_endpoint(req: SettingsRequest):
     data = {k: v for k, v in req.model_dump().items() if v is not None}
-    return update_settings(data)
+    if data.get("response_cache", "off") not in RESPONSE_CACHE_MODES:
+        raise HTTPException(status_code=400, detail=f"response_cache must be one of {RESPONSE_CACHE_MODES}")
+    if data.get("vector_store", "chroma") not in VECTOR_STORES:
+        raise HTTPException(status_code=400, detail=f"vector_store must be one of {VECTOR_STORES}")
+    if data.get("embedding_backend", "torch") not in EMBEDDING_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"embedding_backend must be one of {EMBEDDING_BACKENDS}")
+    if data.get("embedding_threads", 0) < 0:
+        raise HTTPException(status_code=400, detail="embedding_threads must be 0 (default) or more")
+    previous = {k: get_settings()[k] for k in ("embedding_backend", "embedding_threads", "vector_store")}
+    settings = update_settings(data)
+    if "model" in data or "ollama_url" in data:
+        _in_background(preload_model())
+    if settings["vector_store"] != previous.pop("vector_store"):
+        await asyncio.to_thread(_sync_vector_store)
+    if any(settings[k] != v for k, v in previous.items()):
+        embedding_service.reset()
+        get_search_cache().clear()  # cached query vectors came from the old backend
+        _in_background(asyncio.to_thread(embedding_service.warmup))
+    return settings
 
 
 # ── Fine-tuning endpoints ──────────────────────────────────────────────────
@@ -406,8 +741,36 @@ async def training_register(req: RegisterRequest):
     )
 
 
+# ── LLM queue ──────────────────────────────────────────────────────────────
+
+@app.get("/llm/queue")
+async def llm_queue():
+    """Concurrency, queue depth and wait-time metrics for LLM calls."""
+    return get_scheduler().stats()
+
+
+@app.get("/llm/cache")
+async def llm_cache():
+    """Hit-rate statistics for the untagged-question response cache."""
+    return {"mode": get_settings()["response_cache"], **get_response_cache().stats()}
+
+
+@app.delete("/llm/cache")
+async def clear_llm_cache():
+    get_response_cache().clear()
+    return {"status": "cleared"}
+
+
+# ── Embeddings ─────────────────────────────────────────────────────────────
+
+@app.get("/embeddings")
+async def embeddings_stats():
+    """Readiness, batching counters and memory use of the shared embedding model."""
+    return embedding_service.stats()
+
+
 # ── Health check ───────────────────────────────────────────────────────────
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {"status": "ok", "embeddings": embedding_service.status()}
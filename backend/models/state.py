@@ -7,4 +7,5 @@ from langgraph.graph.message import add_messages
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], add_messages]
     chat_id: str
+    summary: str
     next: str
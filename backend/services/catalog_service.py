@@ -0,0 +1,450 @@
+"""
+Document bookkeeping — SQLite (WAL) at ~/.manasu/documents.db.
+
+manifest: one row per file ingested through a folder sync, keyed by absolute
+path, so a resync only extracts and embeds files whose size/mtime and content
+hash changed. Files that could not be ingested have an empty doc_id.
+
+documents: one row per ingested document, so listing and counting documents
+doesn't scan every chunk.
+
+jobs: background ingestion jobs, so their state outlives a page reload.
+
+chunks / chunks_fts: a copy of every chunk in the documents collection with an
+FTS5 inverted index over it, ranked with BM25. It catches exact identifiers,
+names and numbers that the dense MiniLM search misses. Chunks are content
+addressed, so identical text is stored (and embedded) once.
+
+doc_chunks: which chunk sits at each position of each document. A chunk is
+deleted once no document references it any more.
+
+watch_folders: folders kept in sync by the filesystem watcher, so they are
+watched again after a restart.
+"""
+import json
+import re
+import sqlite3
+import threading
+from typing import Optional
+
+from config import CATALOG_DB_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest (
+    path        TEXT PRIMARY KEY,
+    doc_id      TEXT NOT NULL,
+    mtime       REAL NOT NULL,
+    size        INTEGER NOT NULL,
+    hash        TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id      TEXT PRIMARY KEY,
+    filename    TEXT NOT NULL,
+    path        TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    upload_date TEXT NOT NULL,
+    hash        TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_documents_uploaded ON documents (upload_date);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id     TEXT PRIMARY KEY,
+    kind       TEXT NOT NULL,
+    target     TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    progress   TEXT NOT NULL DEFAULT '{}',
+    result     TEXT,
+    error      TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+
+CREATE TABLE IF NOT EXISTS chunks (
+    id       INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL UNIQUE,
+    content  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS doc_chunks (
+    doc_id      TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    chunk_id    TEXT NOT NULL,
+    page        INTEGER,
+    PRIMARY KEY (doc_id, chunk_index)
+);
+CREATE INDEX IF NOT EXISTS idx_doc_chunks_chunk ON doc_chunks (chunk_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5 (
+    content,
+    content = 'chunks',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
+    INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO chunks_fts (rowid, content) VALUES (new.id, new.content);
+END;
+
+CREATE TABLE IF NOT EXISTS watch_folders (
+    path     TEXT PRIMARY KEY,
+    added_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+MAX_QUERY_TERMS = 32
+
+_TERM_RE = re.compile(r"\w+")
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    with _lock:
+        if _conn is None:
+            conn = sqlite3.connect(CATALOG_DB_PATH, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            _conn = conn
+    return _conn
+
+
+def get_manifest(folder: str) -> dict[str, dict]:
+    """Manifest rows for every file under folder, keyed by path."""
+    prefix = folder.rstrip("/") + "/"
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute(
+            "SELECT * FROM manifest WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+        ).fetchall()
+    return {row["path"]: dict(row) for row in rows}
+
+
+def upsert_manifest(path: str, doc_id: str, mtime: float, size: int, hash: str, chunk_count: int) -> None:
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute(
+            "INSERT INTO manifest (path, doc_id, mtime, size, hash, chunk_count) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET doc_id = excluded.doc_id, mtime = excluded.mtime, "
+            "size = excluded.size, hash = excluded.hash, chunk_count = excluded.chunk_count",
+            (path, doc_id, mtime, size, hash, chunk_count),
+        )
+
+
+def delete_manifest(path: str) -> None:
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute("DELETE FROM manifest WHERE path = ?", (path,))
+
+
+def delete_manifest_for_doc(doc_id: str) -> None:
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute("DELETE FROM manifest WHERE doc_id = ?", (doc_id,))
+
+
+# --- documents ----------------------------------------------------------------
+
+_INSERT_DOCUMENT = (
+    "INSERT INTO documents (doc_id, filename, path, chunk_count, upload_date, hash) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (doc_id) DO UPDATE SET filename = excluded.filename, path = excluded.path, "
+    "chunk_count = excluded.chunk_count, upload_date = excluded.upload_date, hash = excluded.hash"
+)
+
+
+def upsert_documents(rows: list[tuple[str, str, str, int, str, str]]) -> None:
+    """Add or replace (doc_id, filename, path, chunk_count, upload_date, hash) rows."""
+    if not rows:
+        return
+    conn = _get_conn()
+    with _lock, conn:
+        conn.executemany(_INSERT_DOCUMENT, rows)
+
+
+def get_document(doc_id: str) -> dict | None:
+    conn = _get_conn()
+    with _lock:
+        row = conn.execute("SELECT * FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_documents() -> list[dict]:
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute("SELECT * FROM documents ORDER BY upload_date DESC").fetchall()
+    return [dict(row) for row in rows]
+
+
+def count_documents() -> int:
+    conn = _get_conn()
+    with _lock:
+        return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+def delete_document(doc_id: str) -> None:
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+
+def backfill_documents(rows: list[tuple[str, str, str, int, str, str]]) -> None:
+    """Add rows for documents stored before the catalog existed; catalogued ones are kept as is."""
+    conn = _get_conn()
+    with _lock, conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO documents (doc_id, filename, path, chunk_count, upload_date, hash) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('documents_built', '1')")
+
+
+def documents_built() -> bool:
+    conn = _get_conn()
+    with _lock:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'documents_built'").fetchone()
+    return row is not None
+
+
+# --- chunks -------------------------------------------------------------------
+
+def existing_chunk_ids(chunk_ids: list[str]) -> set[str]:
+    """The subset of chunk_ids already stored."""
+    if not chunk_ids:
+        return set()
+    conn = _get_conn()
+    found: set[str] = set()
+    with _lock:
+        for i in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[i:i + 500]
+            rows = conn.execute(
+                f"SELECT chunk_id FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            found.update(row[0] for row in rows)
+    return found
+
+
+def add_chunks(chunks: list[tuple[str, str]], refs: list[tuple[str, int, str, int | None]]) -> None:
+    """
+    Store new (chunk_id, content) rows and (doc_id, chunk_index, chunk_id, page)
+    references in one transaction.
+    """
+    conn = _get_conn()
+    with _lock, conn:
+        conn.executemany("INSERT OR IGNORE INTO chunks (chunk_id, content) VALUES (?, ?)", chunks)
+        conn.executemany(
+            "INSERT INTO doc_chunks (doc_id, chunk_index, chunk_id, page) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (doc_id, chunk_index) DO UPDATE SET chunk_id = excluded.chunk_id, page = excluded.page",
+            refs,
+        )
+
+
+def delete_doc_chunks(doc_id: str) -> list[str]:
+    """
+    Drop a document's chunk references, and the chunks no other document
+    references. Returns the ids of the chunks deleted.
+    """
+    conn = _get_conn()
+    with _lock, conn:
+        ids = [row[0] for row in conn.execute(
+            "SELECT DISTINCT chunk_id FROM doc_chunks WHERE doc_id = ?", (doc_id,)
+        )]
+        conn.execute("DELETE FROM doc_chunks WHERE doc_id = ?", (doc_id,))
+        orphans = [
+            chunk_id for chunk_id in ids
+            if conn.execute("SELECT 1 FROM doc_chunks WHERE chunk_id = ? LIMIT 1", (chunk_id,)).fetchone() is None
+        ]
+        conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(c,) for c in orphans])
+    return orphans
+
+
+def resolve_chunks(chunk_ids: list[str]) -> dict[str, dict]:
+    """
+    One catalogued document position per chunk id, with the chunk's text:
+    {chunk_id: {doc_id, chunk_index, filename, page, content}}. Shared chunks
+    resolve to the earliest reference. Chunks of documents still being
+    ingested are left out.
+    """
+    if not chunk_ids:
+        return {}
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute(
+            "SELECT r.chunk_id, MIN(r.rowid), r.doc_id, r.chunk_index, r.page, d.filename, c.content "
+            "FROM doc_chunks r JOIN documents d ON d.doc_id = r.doc_id "
+            "JOIN chunks c ON c.chunk_id = r.chunk_id "
+            f"WHERE r.chunk_id IN ({','.join('?' * len(chunk_ids))}) GROUP BY r.chunk_id",
+            chunk_ids,
+        ).fetchall()
+    return {
+        row["chunk_id"]: {
+            "doc_id": row["doc_id"],
+            "chunk_index": row["chunk_index"],
+            "filename": row["filename"],
+            "page": row["page"],
+            "content": row["content"],
+        }
+        for row in rows
+    }
+
+
+def chunk_texts(chunk_ids: list[str]) -> dict[str, str]:
+    """Content of those of chunk_ids that are stored."""
+    conn = _get_conn()
+    found: dict[str, str] = {}
+    with _lock:
+        for i in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[i:i + 500]
+            rows = conn.execute(
+                f"SELECT chunk_id, content FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            found.update((row[0], row[1]) for row in rows)
+    return found
+
+
+def list_chunk_ids() -> list[str]:
+    conn = _get_conn()
+    with _lock:
+        return [row[0] for row in conn.execute("SELECT chunk_id FROM chunks")]
+
+
+def count_chunks() -> dict:
+    """Stored (unique) chunks vs document references to them."""
+    conn = _get_conn()
+    with _lock:
+        unique = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        refs = conn.execute("SELECT COUNT(*) FROM doc_chunks").fetchone()[0]
+    return {"unique": unique, "references": refs}
+
+
+def keyword_search(query: str, limit: int) -> list[dict]:
+    """BM25-ranked chunks matching any term of query: [{id, content, score}], best first."""
+    terms = list(dict.fromkeys(_TERM_RE.findall(query.lower())))[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    match = " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute(
+            "SELECT c.chunk_id, c.content, bm25(chunks_fts) AS rank "
+            "FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid "
+            "WHERE chunks_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit),
+        ).fetchall()
+    return [{"id": row["chunk_id"], "content": row["content"], "score": -row["rank"]} for row in rows]
+
+
+def backfill_chunks(chunks: list[tuple[str, str]], refs: list[tuple[str, int, str, int | None]]) -> None:
+    """Index chunks stored before this index existed; existing rows are kept."""
+    conn = _get_conn()
+    with _lock, conn:
+        conn.executemany("INSERT OR IGNORE INTO chunks (chunk_id, content) VALUES (?, ?)", chunks)
+        conn.executemany(
+            "INSERT OR IGNORE INTO doc_chunks (doc_id, chunk_index, chunk_id, page) VALUES (?, ?, ?, ?)",
+            refs,
+        )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('chunks_built', '1')")
+
+
+def chunks_built() -> bool:
+    conn = _get_conn()
+    with _lock:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'chunks_built'").fetchone()
+    return row is not None
+
+
+# --- watch folders ----------------------------------------------------------
+
+def list_watch_folders() -> list[dict]:
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute("SELECT * FROM watch_folders ORDER BY added_at").fetchall()
+    return [dict(row) for row in rows]
+
+
+def add_watch_folder(path: str, added_at: str) -> None:
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO watch_folders (path, added_at) VALUES (?, ?)", (path, added_at)
+        )
+
+
+def remove_watch_folder(path: str) -> bool:
+    conn = _get_conn()
+    with _lock, conn:
+        cur = conn.execute("DELETE FROM watch_folders WHERE path = ?", (path,))
+    return cur.rowcount > 0
+
+
+# --- jobs -------------------------------------------------------------------
+
+def _job_from_row(row: sqlite3.Row) -> dict:
+    job = dict(row)
+    job["progress"] = json.loads(job["progress"] or "{}")
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def save_job(job: dict) -> None:
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute(
+            "INSERT INTO jobs (job_id, kind, target, status, progress, result, error, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (job_id) DO UPDATE SET status = excluded.status, progress = excluded.progress, "
+            "result = excluded.result, error = excluded.error, updated_at = excluded.updated_at",
+            (
+                job["job_id"],
+                job["kind"],
+                job["target"],
+                job["status"],
+                json.dumps(job["progress"]),
+                json.dumps(job["result"]) if job["result"] is not None else None,
+                job["error"],
+                job["created_at"],
+                job["updated_at"],
+            ),
+        )
+
+
+def get_job(job_id: str) -> dict | None:
+    conn = _get_conn()
+    with _lock:
+        row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    return _job_from_row(row) if row else None
+
+
+def list_jobs(limit: int = 50) -> list[dict]:
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute(
+            "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return [_job_from_row(row) for row in rows]
+
+
+def mark_interrupted_jobs() -> None:
+    """Jobs left queued/running by a previous process will never finish."""
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'interrupted' WHERE status IN ('queued', 'running')"
+        )
@@ -1,10 +1,8 @@
-import json
-import uuid
-from datetime import datetime
 from typing import Optional
 import chromadb
 from chromadb.config import Settings
 from config import CHROMA_DIR
+from services.embedding_service import get_embedding_function
 
 
 _client: Optional[chromadb.PersistentClient] = None
@@ -20,122 +18,12 @@ def _get_client() -> chromadb.PersistentClient:
     return _client
 
 
-def _get_sessions_collection():
+def get_collection(name: str, create: bool = True) -> chromadb.Collection:
+    """
+    Collection bound to the shared embedding model. Going through here keeps
+    Chroma from falling back to its own ONNX MiniLM for any collection.
+    """
     client = _get_client()
-    return client.get_or_create_collection("chat_sessions")
-
-
-def _get_messages_collection():
-    client = _get_client()
-    return client.get_or_create_collection("chat_messages")
-
-
-def create_chat(title: str = "New Chat") -> str:
-    """Create a new chat session, return chat_id."""
-    chat_id = str(uuid.uuid4())
-    col = _get_sessions_collection()
-    col.add(
-        ids=[chat_id],
-        documents=[title],
-        metadatas=[{
-            "title": title,
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-            "preview": "",
-        }],
-    )
-    return chat_id
-
-
-def save_message(chat_id: str, role: str, content: str) -> None:
-    """Save a message to ChromaDB and update session preview."""
-    msg_id = str(uuid.uuid4())
-    msg_col = _get_messages_collection()
-    msg_col.add(
-        ids=[msg_id],
-        documents=[content],
-        metadatas=[{
-            "chat_id": chat_id,
-            "role": role,
-            "timestamp": datetime.utcnow().isoformat(),
-        }],
-    )
-
-    # Update session preview
-    sess_col = _get_sessions_collection()
-    try:
-        result = sess_col.get(ids=[chat_id])
-        if result["metadatas"]:
-            meta = result["metadatas"][0]
-            meta["preview"] = content[:100]
-            meta["updated_at"] = datetime.utcnow().isoformat()
-            sess_col.update(ids=[chat_id], metadatas=[meta])
-    except Exception:
-        pass
-
-
-def get_chat_messages(chat_id: str) -> list[dict]:
-    """Get all messages for a chat session, ordered by timestamp."""
-    msg_col = _get_messages_collection()
-    result = msg_col.get(where={"chat_id": chat_id})
-    if not result["ids"]:
-        return []
-
-    messages = []
-    for i, doc in enumerate(result["documents"]):
-        meta = result["metadatas"][i]
-        messages.append({
-            "role": meta["role"],
-            "content": doc,
-            "timestamp": meta.get("timestamp", ""),
-        })
-    messages.sort(key=lambda x: x["timestamp"])
-    return messages
-
-
-def list_sessions() -> list[dict]:
-    """List all chat sessions sorted by updated_at desc."""
-    sess_col = _get_sessions_collection()
-    result = sess_col.get()
-    if not result["ids"]:
-        return []
-
-    sessions = []
-    for i, chat_id in enumerate(result["ids"]):
-        meta = result["metadatas"][i]
-        sessions.append({
-            "chat_id": chat_id,
-            "title": meta.get("title", "Untitled"),
-            "preview": meta.get("preview", ""),
-            "timestamp": meta.get("updated_at", meta.get("created_at", "")),
-        })
-    sessions.sort(key=lambda x: x["timestamp"], reverse=True)
-    return sessions
-
-
-def delete_session(chat_id: str) -> None:
-    """Delete a chat session and all its messages."""
-    sess_col = _get_sessions_collection()
-    msg_col = _get_messages_collection()
-
-    try:
-        sess_col.delete(ids=[chat_id])
-    except Exception:
-        pass
-
-    try:
-        msg_col.delete(where={"chat_id": chat_id})
-    except Exception:
-        pass
-
-
-def update_session_title(chat_id: str, title: str) -> None:
-    sess_col = _get_sessions_collection()
-    try:
-        result = sess_col.get(ids=[chat_id])
-        if result["metadatas"]:
-            meta = result["metadatas"][0]
-            meta["title"] = title
-            sess_col.update(ids=[chat_id], documents=[title], metadatas=[meta])
-    except Exception:
-        pass
+    if create:
+        return client.get_or_create_collection(name=name, embedding_function=get_embedding_function())
+    return client.get_collection(name=name, embedding_function=get_embedding_function())
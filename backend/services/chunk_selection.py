@@ -0,0 +1,125 @@
+"""
+Choosing which retrieved chunks go into the [files] context.
+
+Search returns overlapping neighbours and near-duplicates (the same paragraph
+in two copies of a file). Selection runs in three steps:
+
+1. Merge adjacent chunks of the same document into one span, removing the
+   text they share.
+2. Order spans by maximal marginal relevance. Each pick trades retrieval rank
+   against similarity to what is already picked, and anything at least
+   DUPLICATE_SIMILARITY to a picked span is dropped.
+3. Pack spans into a token budget in that order.
+"""
+import numpy as np
+
+from services.token_budget import estimate_tokens, truncate_to_tokens
+
+MMR_LAMBDA = 0.7  # 1.0 = rank only, 0.0 = diversity only
+DUPLICATE_SIMILARITY = 0.95
+MAX_OVERLAP_CHARS = 400  # ~CHUNK_OVERLAP_TOKENS of carried-over sentences
+MIN_PARTIAL_TOKENS = 64  # don't pack a truncated span shorter than this
+
+
+def _join(a: str, b: str) -> str:
+    """Concatenate consecutive chunks, dropping the overlap between them."""
+    for k in range(min(len(a), len(b), MAX_OVERLAP_CHARS), 0, -1):
+        if a.endswith(b[:k]):
+            return a + b[k:]
+    return a + "\n" + b
+
+
+def _unit(vec) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32)
+    return v / (np.linalg.norm(v) or 1.0)
+
+
+def merge_adjacent(chunks: list[dict], embeddings: dict[str, list[float]]) -> list[dict]:
+    """
+    Group chunks into spans of consecutive chunk_index per document.
+    Each span keeps the best rank of its chunks and the mean of their embeddings.
+    """
+    by_doc: dict[str, list[tuple[int, dict]]] = {}
+    for rank, chunk in enumerate(chunks):
+        by_doc.setdefault(chunk["doc_id"], []).append((rank, chunk))
+
+    spans = []
+    for members in by_doc.values():
+        members.sort(key=lambda rc: rc[1]["chunk_index"])
+        group = [members[0]]
+        for rank, chunk in members[1:]:
+            if chunk["chunk_index"] == group[-1][1]["chunk_index"] + 1:
+                group.append((rank, chunk))
+            else:
+                spans.append(_make_span(group, embeddings))
+                group = [(rank, chunk)]
+        spans.append(_make_span(group, embeddings))
+    return sorted(spans, key=lambda s: s["rank"])
+
+
+def _make_span(group: list[tuple[int, dict]], embeddings: dict[str, list[float]]) -> dict:
+    content = group[0][1]["content"]
+    for _, chunk in group[1:]:
+        content = _join(content, chunk["content"])
+    vecs = [_unit(embeddings[c["id"]]) for _, c in group if c["id"] in embeddings]
+    return {
+        "filename": group[0][1]["filename"],
+        "content": content,
+        "rank": min(rank for rank, _ in group),
+        "vec": _unit(np.mean(vecs, axis=0)) if vecs else None,
+    }
+
+
+def mmr_order(spans: list[dict]) -> list[dict]:
+    """Order spans by maximal marginal relevance, dropping near-duplicates."""
+    if not spans:
+        return []
+    # Relevance from retrieval rank, so keyword-only hits are not penalised
+    # for a low cosine score
+    relevance = {id(s): 1.0 / (1 + s["rank"]) for s in spans}
+    top = max(relevance.values())
+    remaining = list(spans)
+    picked: list[dict] = []
+    while remaining:
+        best, best_score = None, -np.inf
+        for span in remaining:
+            redundancy = max(
+                (float(span["vec"] @ p["vec"]) for p in picked
+                 if span["vec"] is not None and p["vec"] is not None),
+                default=0.0,
+            )
+            if redundancy >= DUPLICATE_SIMILARITY:
+                span["duplicate"] = True
+                continue
+            score = MMR_LAMBDA * relevance[id(span)] / top - (1 - MMR_LAMBDA) * redundancy
+            if score > best_score:
+                best, best_score = span, score
+        remaining = [s for s in remaining if s is not best and not s.get("duplicate")]
+        if best is None:
+            break
+        picked.append(best)
+    return picked
+
+
+def pack(spans: list[dict], max_tokens: int) -> list[dict]:
+    """Take spans in order while they fit; truncate the first one that doesn't, if worthwhile."""
+    packed = []
+    remaining = max_tokens
+    for span in spans:
+        block = f"[{span['filename']}]\n{span['content']}"
+        tokens = estimate_tokens(block)
+        if tokens <= remaining:
+            packed.append(span)
+            remaining -= tokens
+        elif remaining >= MIN_PARTIAL_TOKENS:
+            header = estimate_tokens(f"[{span['filename']}]\n")
+            packed.append({**span, "content": truncate_to_tokens(span["content"], remaining - header)})
+            break
+        else:
+            break
+    return packed
+
+
+def select_chunks(chunks: list[dict], embeddings: dict[str, list[float]], max_tokens: int) -> list[dict]:
+    """Merge, de-duplicate and pack ranked search results. Returns [{filename, content, ...}]."""
+    return pack(mmr_order(merge_adjacent(chunks, embeddings)), max_tokens)
@@ -1,168 +1,649 @@
+import hashlib
+import os
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
-from services.chroma_service import _get_client
+from services.embedding_service import embed
+from services.search_cache import get_search_cache
+from services.settings_service import get_settings
+from services import catalog_service
+from services.vector_store import ChromaStore, VectorStore, existing_stores, open_store
+from services.extraction import SUPPORTED_EXTENSIONS, extract_file, file_hash, iter_chunks
 
-SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt", ".md"}
-CHUNK_SIZE = 500
-CHUNK_OVERLAP = 50
+EMBED_BATCH_SIZE = 256
+EXTRACT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+# Folder-sync files above this size are streamed in-process rather than
+# extracted whole in a worker and shipped back as one chunk list.
+STREAM_FILE_BYTES = 16 * 1024 * 1024
+SEARCH_CANDIDATES = 30  # taken from each of the dense and keyword rankings before fusion
+RRF_K = 60  # reciprocal rank fusion damping constant
 
-_ef = SentenceTransformerEmbeddingFunction("all-MiniLM-L6-v2")
-_collection = None
+_collection: VectorStore | None = None
+# Bumped after every write to the collection; keys the search result cache
+_version = 0
+_version_lock = threading.Lock()
+_open_lock = threading.Lock()
+# Serializes "is this chunk stored / still referenced" decisions with the
+# vector store writes that follow them
+_write_lock = threading.RLock()
 
 
-def _get_collection():
+def _get_collection() -> VectorStore:
+    """
+    The active documents vector store, opened on first use. Opening is cheap;
+    bringing a store in line with the catalog is sync_vector_store's job.
+    """
     global _collection
     if _collection is None:
-        _collection = _get_client().get_or_create_collection(
-            name="documents",
-            embedding_function=_ef,
-        )
+        with _open_lock:
+            if _collection is None:
+                _collection = open_store(get_settings()["vector_store"])
     return _collection
 
 
-def _extract_text(filepath: Path) -> str:
-    suffix = filepath.suffix.lower()
-    if suffix == ".pdf":
-        try:
-            from pypdf import PdfReader
-            reader = PdfReader(str(filepath))
-            return "\n".join(page.extract_text() or "" for page in reader.pages)
-        except Exception as e:
-            raise ValueError(f"Failed to read PDF: {e}")
-    elif suffix == ".docx":
-        try:
-            from docx import Document
-            doc = Document(str(filepath))
-            return "\n".join(p.text for p in doc.paragraphs)
-        except Exception as e:
-            raise ValueError(f"Failed to read DOCX: {e}")
-    elif suffix in {".txt", ".md"}:
-        return filepath.read_text(encoding="utf-8", errors="ignore")
+def vector_store_needs_sync() -> bool:
+    """Whether the store or the catalog lags the other, or vector_store names another backend."""
+    store = _get_collection()
+    return (
+        store.name != get_settings()["vector_store"]
+        or not (catalog_service.documents_built() and catalog_service.chunks_built())
+        or store.count() != catalog_service.count_chunks()["unique"]
+    )
+
+
+def sync_vector_store(
+    on_progress: Callable[[dict], None] | None = None,
+    cancel: threading.Event | None = None,
+) -> dict:
+    """
+    Backfill the catalog if needed, bring the store chosen by the vector_store
+    setting in line with it, then make that store the active one. After a
+    switch this copies (or re-embeds) every chunk, so it runs as a background
+    job; until it finishes the previously active store keeps serving searches.
+    """
+    global _collection
+    backend = get_settings()["vector_store"]
+    active = _get_collection()
+    store = active if active.name == backend else open_store(backend)
+    _ensure_backfilled(store)
+    copied = _reconcile(store, on_progress, cancel)
+    if cancel and cancel.is_set():
+        return {"backend": backend, "chunks_copied": copied, "cancelled": True}
+    with _write_lock:
+        # Catch up with deletions made while the bulk copy ran
+        _reconcile(store)
+        _collection = store
+    _bump_version()
+    return {"backend": backend, "chunks_copied": copied, "cancelled": False}
+
+
+def collection_version() -> int:
+    return _version
+
+
+def _bump_version() -> None:
+    global _version
+    with _version_lock:
+        _version += 1
+
+
+def chunk_id_for(text: str) -> str:
+    """Content-addressed chunk id: identical text always maps to the same chunk."""
+    return "c-" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _delete_chunks(collection: VectorStore, doc_id: str) -> None:
+    """Remove a document's chunk references and the chunks nobody else references."""
+    with _write_lock:
+        orphans = catalog_service.delete_doc_chunks(doc_id)
+        for i in range(0, len(orphans), EMBED_BATCH_SIZE):
+            collection.delete(ids=orphans[i:i + EMBED_BATCH_SIZE])
+        catalog_service.delete_document(doc_id)
+    _bump_version()
+
+
+def _ensure_backfilled(store: VectorStore) -> None:
+    """
+    Fill the document catalog and the chunk index from Chroma metadata for
+    documents stored before they existed. Runs once.
+    """
+    if catalog_service.documents_built() and catalog_service.chunks_built():
+        return
+    # Chunks from before the catalog can only be in Chroma
+    chroma = store if isinstance(store, ChromaStore) else next(
+        (s for s in existing_stores(exclude=store.name) if isinstance(s, ChromaStore)), None
+    )
+    if chroma is None:
+        stored = {"ids": [], "documents": [], "metadatas": []}
     else:
-        raise ValueError(f"Unsupported file type: {suffix}")
+        stored = chroma.get_all()
+    docs: dict[str, list] = {}
+    chunks, refs = [], []
+    for chunk_id, doc, meta in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+        if not meta or "doc_id" not in meta:
+            continue
+        row = docs.setdefault(meta["doc_id"], [
+            meta["doc_id"], meta.get("filename", ""), meta.get("filepath", ""),
+            0, meta.get("upload_date", ""), "",
+        ])
+        row[3] += 1
+        chunks.append((chunk_id, doc or ""))
+        refs.append((meta["doc_id"], meta.get("chunk_index", 0), chunk_id, meta.get("page")))
+    catalog_service.backfill_documents([tuple(row) for row in docs.values()])
+    catalog_service.backfill_chunks(chunks, refs)
+    _bump_version()
+
+
+def _chunk_metadatas(chunk_ids: list[str]) -> list[dict]:
+    """
+    Store metadata for chunks rebuilt from the catalog: the position of each
+    chunk's first reference. Chroma rejects empty metadata, so a chunk with no
+    catalogued document yet still gets its id.
+    """
+    resolved = catalog_service.resolve_chunks(chunk_ids)
+    metadatas = []
+    for chunk_id in chunk_ids:
+        ref = resolved.get(chunk_id)
+        if ref is None:
+            metadatas.append({"chunk_id": chunk_id})
+            continue
+        meta = {"doc_id": ref["doc_id"], "filename": ref["filename"], "chunk_index": ref["chunk_index"]}
+        if ref["page"] is not None:
+            meta["page"] = ref["page"]
+        metadatas.append(meta)
+    return metadatas
 
 
-def _chunk_text(text: str) -> list[str]:
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + CHUNK_SIZE
-        chunks.append(text[start:end])
-        start += CHUNK_SIZE - CHUNK_OVERLAP
-    return [c for c in chunks if c.strip()]
+def _reconcile(
+    store: VectorStore,
+    on_progress: Callable[[dict], None] | None = None,
+    cancel: threading.Event | None = None,
+) -> int:
+    """
+    Make store hold exactly the catalogued chunks, e.g. after switching
+    vector_store. Missing vectors are copied from another backend that has
+    them, and only embedded again when none does. Returns how many chunks
+    were added; on_progress gets {chunks_total, chunks_processed} per batch.
+    """
+    if store.count() == catalog_service.count_chunks()["unique"]:
+        return 0
+    wanted = catalog_service.list_chunk_ids()
+    stored = set(store.ids())
+    extra = list(stored.difference(wanted))
+    for i in range(0, len(extra), EMBED_BATCH_SIZE):
+        store.delete(extra[i:i + EMBED_BATCH_SIZE])
+    missing = [chunk_id for chunk_id in wanted if chunk_id not in stored]
+    if not missing:
+        return 0
+    donors = existing_stores(exclude=store.name)
+    batch = min(EMBED_BATCH_SIZE, store.max_batch_size())
+    for i in range(0, len(missing), batch):
+        if cancel and cancel.is_set():
+            return i
+        ids = missing[i:i + batch]
+        vectors: dict[str, list[float]] = {}
+        for donor in donors:
+            vectors.update(donor.get_embeddings([c for c in ids if c not in vectors]))
+        texts = catalog_service.chunk_texts(ids)
+        todo = [c for c in ids if c not in vectors and c in texts]
+        vectors.update(zip(todo, embed([texts[c] for c in todo])))
+        ids = [c for c in ids if c in vectors and c in texts]
+        store.upsert(ids, [vectors[c] for c in ids], [texts[c] for c in ids], _chunk_metadatas(ids))
+        if on_progress:
+            on_progress({"chunks_total": len(missing), "chunks_processed": min(i + batch, len(missing))})
+    return len(missing)
 
 
-def ingest_file(filepath: str | Path) -> dict:
-    """Load → extract text → chunk → embed → store. Returns {doc_id, filename, chunk_count}."""
+class _BatchWriter:
+    """
+    Buffers chunks from many files and writes them in large embed + upsert
+    batches. Chunks are content addressed: text that is already stored, or
+    already buffered, is only referenced again, not re-embedded.
+    """
+
+    def __init__(self, collection, on_flush: Callable[[int], None] | None = None):
+        self.collection = collection
+        self.on_flush = on_flush
+        self.max_batch = min(EMBED_BATCH_SIZE, collection.max_batch_size())
+        # chunk_id -> (text, metadata of the first document that produced it)
+        self.pending: dict[str, tuple[str, dict]] = {}
+        # (doc_id, chunk_index, chunk_id, page)
+        self.refs: list[tuple[str, int, str, int | None]] = []
+        # Catalog rows for documents whose chunks are all buffered; written on the next flush
+        self.catalog: list[tuple] = []
+        self.embedded = 0
+        self.reused = 0
+
+    def add(
+        self,
+        filepath: Path,
+        chunks: Iterable[tuple[str, int | None]],
+        doc_id: str | None = None,
+        hash: str = "",
+    ) -> dict:
+        """
+        Buffer (chunk, page) pairs for one document. chunks may be a generator;
+        it is consumed lazily, so at most one batch is held in memory.
+        """
+        doc_id = doc_id or str(uuid.uuid4())
+        upload_date = datetime.utcnow().isoformat()
+        count = 0
+        for i, (chunk, page) in enumerate(chunks):
+            chunk_id = chunk_id_for(chunk)
+            if chunk_id not in self.pending:
+                meta = {
+                    "doc_id": doc_id,
+                    "filename": filepath.name,
+                    "filepath": str(filepath),
+                    "chunk_index": i,
+                    "upload_date": upload_date,
+                    "file_type": filepath.suffix.lower(),
+                }
+                if page is not None:
+                    meta["page"] = page
+                self.pending[chunk_id] = (chunk, meta)
+            self.refs.append((doc_id, i, chunk_id, page))
+            count = i + 1
+            # References are tiny, but bound them too for long, fully duplicated documents
+            if len(self.pending) >= self.max_batch or len(self.refs) >= 8 * self.max_batch:
+                self.flush()
+        if count:
+            self.catalog.append((doc_id, filepath.name, str(filepath), count, upload_date, hash))
+        return {"doc_id": doc_id, "filename": filepath.name, "chunk_count": count}
+
+    def discard(self, doc_id: str) -> None:
+        """Drop a document's still-buffered chunks, e.g. after its extraction failed part-way."""
+        self.refs = [r for r in self.refs if r[0] != doc_id]
+        referenced = {r[2] for r in self.refs}
+        self.pending = {k: v for k, v in self.pending.items() if k in referenced}
+        self.catalog = [row for row in self.catalog if row[0] != doc_id]
+
+    def flush(self) -> None:
+        if not self.refs:
+            catalog_service.upsert_documents(self.catalog)
+            self.catalog = []
+            return
+        with _write_lock:
+            stored = catalog_service.existing_chunk_ids(list(self.pending))
+            new = [chunk_id for chunk_id in self.pending if chunk_id not in stored]
+            if new:
+                texts = [self.pending[c][0] for c in new]
+                self.collection.upsert(
+                    ids=new,
+                    embeddings=embed(texts),
+                    documents=texts,
+                    metadatas=[self.pending[c][1] for c in new],
+                )
+            catalog_service.add_chunks([(c, self.pending[c][0]) for c in new], self.refs)
+            catalog_service.upsert_documents(self.catalog)
+        _bump_version()
+        n = len(self.refs)
+        self.embedded += len(new)
+        self.reused += n - len(new)
+        self.pending, self.refs, self.catalog = {}, [], []
+        if self.on_flush:
+            self.on_flush(n)
+
+
+class IngestCancelled(Exception):
+    pass
+
+
+def ingest_file(
+    filepath: str | Path,
+    on_progress: Callable[[dict], None] | None = None,
+    cancel: threading.Event | None = None,
+) -> dict:
+    """
+    Load → extract text → chunk → embed → store.
+    Returns {doc_id, filename, chunk_count, chunks_reused}; chunks_reused counts
+    chunks whose text was already stored and so weren't embedded again.
+
+    Pages are extracted, chunked and embedded as a stream, so memory stays
+    bounded by one embedding batch however long the document is. on_progress
+    gets {chunks_processed, pages_total, pages_done} after every batch (pages
+    only for PDFs). If extraction fails or cancel is set mid-way, the chunks
+    stored so far are removed; cancelling raises IngestCancelled.
+    """
     filepath = Path(filepath)
     if not filepath.exists():
         raise FileNotFoundError(f"File not found: {filepath}")
     if filepath.suffix.lower() not in SUPPORTED_EXTENSIONS:
         raise ValueError(f"Unsupported file type: {filepath.suffix}")
 
-    text = _extract_text(filepath)
-    chunks = _chunk_text(text)
-    if not chunks:
-        raise ValueError("No text content found in file.")
+    progress = {"chunks_processed": 0}
+
+    def on_page_count(pages: int) -> None:
+        progress.update(pages_total=pages, pages_done=0)
+
+    def chunks() -> Iterator[tuple[str, int | None]]:
+        for chunk, page in iter_chunks(filepath, on_page_count):
+            if page:
+                progress["pages_done"] = page - 1
+            yield chunk, page
+        if "pages_total" in progress:
+            progress["pages_done"] = progress["pages_total"]
+
+    def on_flush(n: int) -> None:
+        progress["chunks_processed"] += n
+        if on_progress:
+            on_progress(dict(progress))
+        if cancel and cancel.is_set():
+            raise IngestCancelled()
 
-    doc_id = str(uuid.uuid4())
-    upload_date = datetime.utcnow().isoformat()
     collection = _get_collection()
+    doc_id = str(uuid.uuid4())
+    writer = _BatchWriter(collection, on_flush=on_flush)
+    try:
+        result = writer.add(filepath, chunks(), doc_id=doc_id, hash=file_hash(str(filepath)))
+        writer.flush()
+    except Exception:
+        _delete_chunks(collection, doc_id)
+        raise
+    if not result["chunk_count"]:
+        raise ValueError("No text content found in file.")
+    return {**result, "chunks_reused": writer.reused}
 
-    ids = [f"{doc_id}-chunk-{i}" for i in range(len(chunks))]
-    metadatas = [
-        {
-            "doc_id": doc_id,
-            "filename": filepath.name,
-            "filepath": str(filepath),
-            "chunk_index": i,
-            "upload_date": upload_date,
-            "file_type": filepath.suffix.lower(),
-        }
-        for i in range(len(chunks))
-    ]
 
-    collection.add(ids=ids, documents=chunks, metadatas=metadatas)
-    return {"doc_id": doc_id, "filename": filepath.name, "chunk_count": len(chunks)}
+def _scope(folder: Path, paths: Iterable[str], manifest: dict[str, dict]) -> tuple[list[Path], dict[str, dict]]:
+    """
+    Files to look at and manifest rows that may have gone, for a sync limited
+    to paths. A path that is now a directory contributes everything under it;
+    one that no longer exists may have been a file or a whole directory.
+    """
+    files: dict[str, Path] = {}
+    prefixes: set[str] = set()
+    for raw in paths:
+        path = Path(raw)
+        if path != folder and folder not in path.parents:
+            continue
+        if path.is_dir():
+            files.update((str(f), f) for f in path.rglob("*"))
+        elif path.is_file():
+            files[str(path)] = path
+        prefixes.add(str(path))
+
+    def in_scope(p: str) -> bool:
+        path = Path(p)
+        return p in prefixes or any(str(parent) in prefixes for parent in path.parents)
+
+    scoped = {p: entry for p, entry in manifest.items() if in_scope(p)}
+    return list(files.values()), scoped
 
 
-def ingest_folder(folder_path: str | Path) -> dict:
-    """Recursively ingest all supported files. Returns {indexed, skipped, errors}."""
-    folder = Path(folder_path).expanduser()
+def ingest_folder(
+    folder_path: str | Path,
+    on_progress: Callable[[dict], None] | None = None,
+    cancel: threading.Event | None = None,
+    paths: Iterable[str] | None = None,
+) -> dict:
+    """
+    Incrementally sync a folder into the documents collection.
+    Returns {added, updated, removed, unchanged, skipped, errors, progress,
+    cancelled, chunks_embedded, chunks_reused}.
+
+    A manifest of path → (mtime, size, content hash, doc_id) decides what to
+    do: files whose size and mtime match are skipped outright, changed files
+    are hashed and only re-extracted if the content differs (their old chunks
+    are replaced), and files that disappeared have their chunks deleted.
+    Files that fail extraction or hold no text are recorded too, with no
+    doc_id, so they are only tried again once they change.
+
+    New and changed files are extracted and chunked in parallel worker
+    processes; their chunks are streamed into one writer that embeds and
+    upserts in EMBED_BATCH_SIZE batches. Files over STREAM_FILE_BYTES are
+    streamed page by page in this process instead, keeping memory bounded.
+    on_progress, if given, is called with the progress counters after every
+    file and every batch. Setting cancel stops after the files already
+    extracted; those are stored and recorded, so the next sync carries on
+    where this one stopped.
+
+    paths, if given, limits the sync to those files and directories under
+    folder (the ones a watcher saw change) instead of walking all of it.
+    """
+    folder = Path(folder_path).expanduser().resolve()
     if not folder.is_dir():
         raise ValueError(f"Not a directory: {folder}")
 
-    indexed, skipped, errors = 0, 0, []
-    for filepath in folder.rglob("*"):
+    manifest = catalog_service.get_manifest(str(folder))
+    collection = _get_collection()
+
+    if paths is None:
+        candidates: Iterable[Path] = folder.rglob("*")
+    else:
+        candidates, manifest = _scope(folder, paths, manifest)
+
+    todo: list[tuple[Path, os.stat_result, dict | None]] = []
+    seen: set[str] = set()
+    skipped = unchanged = 0
+    for filepath in candidates:
         if not filepath.is_file():
             continue
         if filepath.suffix.lower() not in SUPPORTED_EXTENSIONS:
             skipped += 1
             continue
+        path = str(filepath)
+        seen.add(path)
+        st = filepath.stat()
+        entry = manifest.get(path)
+        if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+            unchanged += 1
+            continue
+        if entry and file_hash(path) == entry["hash"]:
+            # Touched but not modified
+            catalog_service.upsert_manifest(path, entry["doc_id"], st.st_mtime, st.st_size, entry["hash"], entry["chunk_count"])
+            unchanged += 1
+            continue
+        todo.append((filepath, st, entry))
+
+    # Files that disappeared are dropped after new ones are stored, so a
+    # renamed or moved file reuses its chunks instead of re-embedding them.
+    gone = [(path, entry) for path, entry in manifest.items() if path not in seen]
+
+    progress = {"files_total": len(todo), "files_done": 0, "chunks_processed": 0, "errors": 0}
+    # Manifest rows are only written once all of a file's chunks are stored,
+    # so an interrupted sync picks the file up again next time.
+    pending: list[tuple] = []
+
+    def report() -> None:
+        if on_progress:
+            on_progress(dict(progress))
+
+    # Previous versions of updated files, deleted once their replacement is stored
+    replaced: list[str] = []
+
+    def commit_pending() -> None:
+        for row in pending:
+            catalog_service.upsert_manifest(*row)
+        pending.clear()
+        for old_doc_id in replaced:
+            _delete_chunks(collection, old_doc_id)
+        replaced.clear()
+
+    def on_flush(n: int) -> None:
+        commit_pending()
+        progress["chunks_processed"] += n
+        report()
+
+    added, updated, errors, cancelled = 0, 0, [], False
+    writer = _BatchWriter(collection, on_flush=on_flush)
+
+    def store(filepath: Path, st: os.stat_result, entry: dict | None, digest: str, chunks) -> None:
+        nonlocal added, updated
+        # A changed file is stored as a new document and the old one dropped
+        # afterwards, so chunks the two versions share are never re-embedded.
+        doc_id = str(uuid.uuid4())
+        try:
+            result = writer.add(filepath, chunks, doc_id=doc_id, hash=digest)
+        except Exception:
+            writer.discard(doc_id)
+            _delete_chunks(collection, doc_id)
+            raise
+        if not result["chunk_count"]:
+            raise ValueError("No text content found in file.")
+        pending.append((str(filepath), doc_id, st.st_mtime, st.st_size, digest, result["chunk_count"]))
+        if entry and entry["doc_id"]:
+            replaced.append(entry["doc_id"])
+            updated += 1
+        else:
+            added += 1
+
+    def failed(filepath: Path, st: os.stat_result, entry: dict | None, e: Exception) -> None:
+        errors.append({"file": filepath.name, "error": str(e)})
+        progress["errors"] += 1
+        try:
+            digest = file_hash(str(filepath))
+        except OSError:
+            digest = ""
+        # No doc_id and no chunks: skipped until its size or mtime changes.
+        # An earlier version's chunks no longer match the file, so drop them.
+        pending.append((str(filepath), "", st.st_mtime, st.st_size, digest, 0))
+        if entry and entry["doc_id"]:
+            replaced.append(entry["doc_id"])
+
+    pooled = [t for t in todo if t[1].st_size <= STREAM_FILE_BYTES]
+    streamed = [t for t in todo if t[1].st_size > STREAM_FILE_BYTES]
+    if pooled:
+        workers = min(EXTRACT_WORKERS, len(pooled))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(extract_file, str(f)): (f, st, entry) for f, st, entry in pooled}
+            for fut in as_completed(futures):
+                if cancel and cancel.is_set():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    cancelled = True
+                    break
+                filepath, st, entry = futures[fut]
+                try:
+                    digest, chunks = fut.result()
+                    if not chunks:
+                        raise ValueError("No text content found in file.")
+                    store(filepath, st, entry, digest, chunks)
+                except Exception as e:
+                    failed(filepath, st, entry, e)
+                progress["files_done"] += 1
+                report()
+
+    for filepath, st, entry in streamed:
+        if cancelled or (cancel and cancel.is_set()):
+            cancelled = True
+            break
         try:
-            ingest_file(filepath)
-            indexed += 1
+            store(filepath, st, entry, file_hash(str(filepath)), iter_chunks(filepath))
         except Exception as e:
-            errors.append({"file": filepath.name, "error": str(e)})
+            failed(filepath, st, entry, e)
+        progress["files_done"] += 1
+        report()
+    writer.flush()
+    commit_pending()
+
+    for path, entry in gone:
+        if entry["doc_id"]:
+            _delete_chunks(collection, entry["doc_id"])
+        catalog_service.delete_manifest(path)
+
+    return {
+        "added": added,
+        "updated": updated,
+        "removed": len(gone),
+        "unchanged": unchanged,
+        "skipped": skipped,
+        "errors": errors,
+        "progress": progress,
+        "cancelled": cancelled,
+        "chunks_embedded": writer.embedded,
+        "chunks_reused": writer.reused,
+    }
+
 
-    return {"indexed": indexed, "skipped": skipped, "errors": errors}
+def _fuse(rankings: list[list[dict]], top_k: int) -> list[dict]:
+    """Reciprocal rank fusion: each list contributes 1 / (RRF_K + rank) per chunk."""
+    scores: dict[str, float] = {}
+    chunks: dict[str, dict] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking):
+            scores[chunk["id"]] = scores.get(chunk["id"], 0.0) + 1.0 / (RRF_K + rank + 1)
+            chunks.setdefault(chunk["id"], chunk)
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [{**chunks[i], "score": round(scores[i], 4)} for i in best]
+
+
+def embed_query(query: str) -> list[float]:
+    """Query embedding, through the search cache."""
+    cache = get_search_cache()
+    vec = cache.get_embedding(query)
+    if vec is None:
+        vec = embed([query])[0]
+        cache.put_embedding(query, vec)
+    return vec
+
+
+def get_chunk_embeddings(ids: list[str]) -> dict[str, list[float]]:
+    """Stored embeddings for chunk ids, read from the vector store rather than recomputed."""
+    if not ids:
+        return {}
+    return _get_collection().get_embeddings(ids)
 
 
 def search_documents(query: str, top_k: int = 5) -> list[dict]:
-    """Semantic search. Returns [{content, filename, score}]."""
+    """
+    Hybrid search: dense MiniLM similarity and BM25 keyword ranking, fused by
+    reciprocal rank. Returns [{id, doc_id, chunk_index, page, content, filename, score}].
+    """
+    cache = get_search_cache()
+    key = (query, top_k, _version)
+    cached = cache.get_results(key)
+    if cached is not None:
+        return cached
+
     collection = _get_collection()
-    count = collection.count()
-    if count == 0:
+    if collection.count() == 0:
         return []
 
-    results = collection.query(query_texts=[query], n_results=min(top_k, count))
-    docs = results.get("documents", [[]])[0]
-    metas = results.get("metadatas", [[]])[0]
-    distances = results.get("distances", [[]])[0]
-
-    output = []
-    for doc, meta, dist in zip(docs, metas, distances):
-        output.append({
-            "content": doc,
-            "filename": meta.get("filename", "unknown"),
-            "score": round(1 - dist, 4),
-        })
+    vec = embed_query(query)
+    candidates = max(top_k, SEARCH_CANDIDATES)
+    dense = [{"id": chunk_id} for chunk_id in collection.query(vec, candidates)]
+    keyword = catalog_service.keyword_search(query, candidates)
+
+    # Chunks can be shared, so their document comes from the reference table
+    where = catalog_service.resolve_chunks(list({hit["id"] for hit in dense + keyword}))
+    rankings = [
+        [
+            {"id": hit["id"], **where[hit["id"]]}
+            for hit in ranking if hit["id"] in where
+        ]
+        for ranking in (dense, keyword)
+    ]
+    output = _fuse(rankings, top_k)
+    cache.put_results(key, output)
     return output
 
 
 def list_documents() -> list[dict]:
-    """Returns [{doc_id, filename, chunk_count, upload_date}]."""
-    collection = _get_collection()
-    if collection.count() == 0:
-        return []
+    """Returns [{doc_id, filename, chunk_count, upload_date}], newest first."""
+    return [
+        {k: doc[k] for k in ("doc_id", "filename", "chunk_count", "upload_date")}
+        for doc in catalog_service.list_documents()
+    ]
 
-    all_results = collection.get(include=["metadatas"])
-    metadatas = all_results.get("metadatas", [])
 
-    seen: dict[str, dict] = {}
-    for meta in metadatas:
-        doc_id = meta.get("doc_id", "")
-        if doc_id not in seen:
-            seen[doc_id] = {
-                "doc_id": doc_id,
-                "filename": meta.get("filename", ""),
-                "chunk_count": 0,
-                "upload_date": meta.get("upload_date", ""),
-            }
-        seen[doc_id]["chunk_count"] += 1
+def count_documents() -> int:
+    return catalog_service.count_documents()
 
-    return sorted(seen.values(), key=lambda x: x["upload_date"], reverse=True)
+
+def chunk_stats() -> dict:
+    """Unique chunks stored vs chunk references across all documents."""
+    return catalog_service.count_chunks()
 
 
 def delete_document(doc_id: str) -> bool:
-    """Delete all chunks for a document_id."""
+    """Delete a document, and those of its chunks no other document shares."""
     collection = _get_collection()
-    results = collection.get(where={"doc_id": doc_id})
-    ids = results.get("ids", [])
-    if not ids:
+    if catalog_service.get_document(doc_id) is None:
         return False
-    collection.delete(ids=ids)
+    _delete_chunks(collection, doc_id)
+    catalog_service.delete_manifest_for_doc(doc_id)
     return True
@@ -0,0 +1,162 @@
+"""
+Inference backends for the shared MiniLM model.
+
+All three run the same all-MiniLM-L6-v2 weights on the CPU and return unit
+vectors, so their outputs are interchangeable within rounding:
+
+- "torch": sentence-transformers on PyTorch, as the app has always run it.
+- "onnx": ONNX Runtime, on the ONNX export of MiniLM that Chroma publishes
+  (downloaded once into Chroma's model cache).
+- "onnx-int8": that ONNX model with its weights dynamically quantized to int8.
+  The model is quantized once and kept in MODELS_DIR.
+
+Batching adapts to the input. Texts are sorted by token length and grouped so
+that each forward pass holds at most BATCH_TOKENS padded tokens. Short texts
+go in large batches and long chunks in small ones, and padding is only ever
+up to the longest text in a batch, not the model's 256-token maximum.
+"""
+from pathlib import Path
+
+import numpy as np
+
+from config import MODELS_DIR
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+MAX_SEQ_TOKENS = 256  # MiniLM's limit; longer texts are truncated
+BATCH_TOKENS = 8192  # padded tokens per forward pass
+MAX_BATCH_ROWS = 256
+
+
+def plan_batches(lengths: list[int]) -> list[list[int]]:
+    """
+    Group text indices into forward passes: shortest first, each batch capped
+    at BATCH_TOKENS padded tokens and MAX_BATCH_ROWS texts.
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    longest = 0
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        n = min(max(lengths[i], 1), MAX_SEQ_TOKENS)
+        if current and (max(longest, n) * (len(current) + 1) > BATCH_TOKENS or len(current) >= MAX_BATCH_ROWS):
+            batches.append(current)
+            current, longest = [], 0
+        current.append(i)
+        longest = max(longest, n)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, threads: int = 0):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(MODEL_NAME, device="cpu")
+        self.model.max_seq_length = min(self.model.max_seq_length or MAX_SEQ_TOKENS, MAX_SEQ_TOKENS)
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        lengths = [
+            len(ids) for ids in
+            self.model.tokenizer(texts, truncation=True, max_length=MAX_SEQ_TOKENS)["input_ids"]
+        ]
+        out = np.zeros((len(texts), self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        for batch in plan_batches(lengths):
+            out[batch] = self.model.encode(
+                [texts[i] for i in batch], batch_size=len(batch), convert_to_numpy=True, normalize_embeddings=True
+            )
+        return out.tolist()
+
+    def model_bytes(self) -> int:
+        return sum(p.numel() * p.element_size() for p in self.model.parameters())
+
+
+def _onnx_model_dir() -> Path:
+    """Chroma's ONNX export of MiniLM, downloaded on first use."""
+    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+    onnx = ONNXMiniLM_L6_V2()
+    onnx._download_model_if_not_exists()
+    return Path(onnx.DOWNLOAD_PATH) / onnx.EXTRACTED_FOLDER_NAME
+
+
+def _quantized(model_path: Path) -> Path:
+    """int8 copy of model_path, quantized the first time it is asked for."""
+    dest = MODELS_DIR / f"{MODEL_NAME}-int8.onnx"
+    if not dest.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        MODELS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_suffix(".tmp.onnx")
+        quantize_dynamic(str(model_path), str(tmp), weight_type=QuantType.QInt8)
+        tmp.replace(dest)
+    return dest
+
+
+class OnnxBackend:
+    def __init__(self, quantized: bool = False, threads: int = 0, model_dir: Path | None = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        model_dir = model_dir or _onnx_model_dir()
+        self.model_path = model_dir / "model.onnx"
+        if quantized:
+            self.model_path = _quantized(self.model_path)
+
+        options = ort.SessionOptions()
+        options.log_severity_level = 3
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(self.model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_TOKENS)
+        self.tokenizer.no_padding()
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        encoded = self.tokenizer.encode_batch(texts)
+        lengths = [len(e.ids) for e in encoded]
+        out: np.ndarray | None = None
+        for batch in plan_batches(lengths):
+            width = max(lengths[i] for i in batch)
+            ids = np.zeros((len(batch), width), dtype=np.int64)
+            mask = np.zeros((len(batch), width), dtype=np.int64)
+            for row, i in enumerate(batch):
+                ids[row, :lengths[i]] = encoded[i].ids
+                mask[row, :lengths[i]] = 1
+            feed = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self.input_names:
+                feed["token_type_ids"] = np.zeros_like(ids)
+            hidden = self.session.run(None, feed)[0]
+            # Mean pooling over real tokens, then unit length, as sentence-transformers does
+            pooled = (hidden * mask[:, :, None]).sum(axis=1) / np.maximum(mask.sum(axis=1, keepdims=True), 1)
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            if out is None:
+                out = np.zeros((len(texts), pooled.shape[1]), dtype=np.float32)
+            out[batch] = pooled
+        return out.tolist()
+
+    def model_bytes(self) -> int:
+        return self.model_path.stat().st_size
+
+
+def load_backend(name: str, threads: int = 0):
+    """A loaded backend: callable on a list of texts, returning unit vectors."""
+    if name == "torch":
+        return TorchBackend(threads)
+    if name in ("onnx", "onnx-int8"):
+        return OnnxBackend(quantized=name == "onnx-int8", threads=threads)
+    raise ValueError(f"Unknown embedding backend: {name}")
@@ -0,0 +1,176 @@
+"""
+Shared MiniLM embedding model.
+
+This is the only embedding model in the process. Every Chroma collection and
+every caller that needs vectors goes through it, so one copy of the weights
+is resident instead of one per embedding stack.
+
+Loading the model imports torch or ONNX Runtime and reads the weights from
+disk, which takes seconds. None of that happens at import time: the model
+is loaded on first use, or by warmup() in the background right after startup,
+so the backend can answer /health as soon as uvicorn is listening.
+
+Calls are funnelled through one worker thread. Requests that arrive while the
+model is busy are merged into one call, up to MAX_BATCH texts, which the
+backend splits into length-sorted forward passes (see embedding_backends).
+The backend (torch, onnx or onnx-int8) and its thread count come from the
+embedding_backend and embedding_threads settings.
+"""
+import queue
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+from services.embedding_backends import MODEL_NAME, load_backend
+from services.settings_service import get_settings
+
+MAX_BATCH = 256
+
+_model = None
+_lock = threading.Lock()
+_state: dict = {"status": "not_loaded", "load_seconds": None, "error": None, "backend": None, "threads": None}
+
+_requests: queue.Queue[tuple[list[str], Future]] = queue.Queue()
+_worker: threading.Thread | None = None
+_stats = {"calls": 0, "batches": 0, "texts": 0}
+
+
+def _load():
+    global _model
+    if _model is not None:
+        return _model
+    with _lock:
+        if _model is None:
+            settings = get_settings()
+            backend, threads = settings["embedding_backend"], settings["embedding_threads"]
+            _state.update(status="loading", error=None, backend=backend, threads=threads)
+            start = time.perf_counter()
+            try:
+                model = load_backend(backend, threads)
+                model(["warmup"])  # first forward pass is much slower than the rest
+            except Exception as e:
+                _state.update(status="error", error=str(e))
+                raise
+            _model = model
+            _state.update(status="ready", load_seconds=round(time.perf_counter() - start, 2))
+    return _model
+
+
+def _run_worker() -> None:
+    while True:
+        batch = [_requests.get()]
+        size = len(batch[0][0])
+        # Merge whatever queued up while the previous batch was running
+        while size < MAX_BATCH:
+            try:
+                item = _requests.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        try:
+            vectors = _load()([t for texts, _ in batch for t in texts])
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            continue
+
+        _stats["calls"] += len(batch)
+        _stats["batches"] += 1
+        _stats["texts"] += size
+        start = 0
+        for texts, fut in batch:
+            fut.set_result(vectors[start:start + len(texts)])
+            start += len(texts)
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is None:
+        with _lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_run_worker, name="manasu-embed", daemon=True)
+                _worker.start()
+
+
+def embed(texts: list[str]) -> list:
+    """Embed texts with the shared model, loading it on first call."""
+    if not texts:
+        return []
+    _ensure_worker()
+    fut: Future = Future()
+    _requests.put((list(texts), fut))
+    return fut.result()
+
+
+class _LazyEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Chroma embedding function that defers loading the model until it is called."""
+
+    def __init__(self) -> None:
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return embed(list(input))
+
+
+_ef: _LazyEmbeddingFunction | None = None
+
+
+def get_embedding_function() -> _LazyEmbeddingFunction:
+    global _ef
+    if _ef is None:
+        _ef = _LazyEmbeddingFunction()
+    return _ef
+
+
+def is_ready() -> bool:
+    return _model is not None
+
+
+def status() -> dict:
+    return {"ready": is_ready(), **_state}
+
+
+def _model_bytes() -> int:
+    model_bytes = getattr(_model, "model_bytes", None)
+    return model_bytes() if model_bytes else 0
+
+
+def stats() -> dict:
+    """Batching counters and memory use of the shared model."""
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024
+    return {
+        **status(),
+        "model": MODEL_NAME,
+        "calls": _stats["calls"],
+        "batches": _stats["batches"],
+        "texts": _stats["texts"],
+        "mean_batch": round(_stats["texts"] / _stats["batches"], 1) if _stats["batches"] else 0.0,
+        "queued": _requests.qsize(),
+        "model_mb": round(_model_bytes() / 2**20, 1),
+        "peak_rss_mb": round(peak_rss / 2**20, 1),
+    }
+
+
+def reset() -> None:
+    """Drop the loaded model so the next call loads it with the current settings."""
+    global _model
+    with _lock:
+        _model = None
+        _state.update(status="not_loaded", load_seconds=None, error=None, backend=None, threads=None)
+
+
+def warmup() -> None:
+    """Load the model now. Errors are recorded in status() rather than raised."""
+    try:
+        _load()
+    except Exception:
+        pass
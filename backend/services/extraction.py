@@ -0,0 +1,251 @@
+"""
+Text extraction and chunking for document ingestion.
+
+Kept free of Chroma / embedding imports so it can run in worker processes
+without each one loading the embedding model.
+"""
+import hashlib
+import re
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt", ".md"}
+TEXT_BATCH_CHARS = 64 * 1024  # DOCX/TXT/MD are streamed in blocks of about this size
+
+# Chunks target CHUNK_TOKENS tokens of the embedding model's tokenizer, below
+# MiniLM's 256-token input limit so nothing is silently truncated when
+# embedding. Consecutive chunks share up to CHUNK_OVERLAP_TOKENS of whole
+# sentences.
+CHUNK_TOKENS = 200
+CHUNK_OVERLAP_TOKENS = 40
+TOKENIZER_REPO = "sentence-transformers/all-MiniLM-L6-v2"
+CHARS_PER_TOKEN = 4  # fallback estimate when the tokenizer isn't cached yet
+
+_PARAGRAPH_RE = re.compile(r"\n[ \t]*\n")
+_HEADING_SPLIT_RE = re.compile(r"\n(?=#{1,6}\s)")
+_HEADING_RE = re.compile(r"#{1,6}\s")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _batched(parts: Iterable[str], sep: str = "\n") -> Iterator[str]:
+    """Join parts into blocks of about TEXT_BATCH_CHARS, only breaking between parts."""
+    batch: list[str] = []
+    size = 0
+    for part in parts:
+        batch.append(part)
+        size += len(part)
+        if size >= TEXT_BATCH_CHARS:
+            yield sep.join(batch)
+            batch, size = [], 0
+    if batch:
+        yield sep.join(batch)
+
+
+def _cut_point(text: str) -> int:
+    """Where to cut an overlong block: after its last line break or sentence end, else at its end."""
+    cut = text.rfind("\n") + 1
+    for match in _SENTENCE_RE.finditer(text, cut):
+        cut = match.end()
+    return cut or len(text)
+
+
+def _text_paragraphs(filepath: Path) -> Iterator[str]:
+    """
+    Lines of a text file, newlines kept, grouped so that blocks end at blank
+    lines. A block that reaches TEXT_BATCH_CHARS without one is cut at its
+    last line break or sentence end, so a file with no blank lines, or one
+    huge line, is still read in bounded pieces.
+    """
+    with open(filepath, encoding="utf-8", errors="ignore") as f:
+        para: list[str] = []
+        size = 0
+        for line in iter(lambda: f.readline(TEXT_BATCH_CHARS), ""):
+            para.append(line)
+            size += len(line)
+            if not line.strip():
+                yield "".join(para)
+                para, size = [], 0
+            elif size >= TEXT_BATCH_CHARS:
+                text = "".join(para)
+                cut = _cut_point(text)
+                yield text[:cut]
+                para, size = [text[cut:]], len(text) - cut
+        if para:
+            yield "".join(para)
+
+
+def iter_pages(
+    filepath: Path, on_page_count: Callable[[int], None] | None = None
+) -> Iterator[tuple[int | None, str]]:
+    """
+    Yield (page number, text) one page at a time for PDFs, and
+    (None, text) blocks of about TEXT_BATCH_CHARS for DOCX/TXT/MD, so a
+    document never has to be held in memory as one string. For PDFs,
+    on_page_count is called with the number of pages once the file is open.
+    """
+    suffix = filepath.suffix.lower()
+    if suffix == ".pdf":
+        try:
+            from pypdf import PdfReader
+            reader = PdfReader(str(filepath))
+            if on_page_count:
+                on_page_count(len(reader.pages))
+            for number, page in enumerate(reader.pages, start=1):
+                yield number, page.extract_text() or ""
+        except Exception as e:
+            raise ValueError(f"Failed to read PDF: {e}")
+    elif suffix == ".docx":
+        try:
+            from docx import Document
+            doc = Document(str(filepath))
+            for block in _batched((p.text for p in doc.paragraphs), sep="\n\n"):
+                yield None, block
+        except Exception as e:
+            raise ValueError(f"Failed to read DOCX: {e}")
+    elif suffix in {".txt", ".md"}:
+        for block in _batched(_text_paragraphs(filepath), sep=""):
+            yield None, block
+    else:
+        raise ValueError(f"Unsupported file type: {suffix}")
+
+
+class _TokenCounter:
+    """
+    Token counts and token-exact splits with the embedding model's tokenizer.
+
+    Only a cached tokenizer.json is used (no download), so worker processes
+    stay offline and fast. Until the embedding model has been downloaded
+    once, counts fall back to CHARS_PER_TOKEN.
+    """
+
+    def __init__(self) -> None:
+        self._tok = None
+        try:
+            from huggingface_hub import try_to_load_from_cache
+            from tokenizers import Tokenizer
+
+            path = try_to_load_from_cache(TOKENIZER_REPO, "tokenizer.json")
+            if isinstance(path, str):
+                self._tok = Tokenizer.from_file(path)
+                self._tok.no_truncation()
+                self._tok.no_padding()
+        except Exception:
+            self._tok = None
+
+    def count(self, text: str) -> int:
+        if self._tok is None:
+            return len(text) // CHARS_PER_TOKEN + 1
+        return len(self._tok.encode(text, add_special_tokens=False).ids)
+
+    def split(self, text: str, max_tokens: int) -> list[tuple[str, int]]:
+        """Cut text into (piece, tokens) of at most max_tokens, at token boundaries."""
+        if self._tok is None:
+            step = max_tokens * CHARS_PER_TOKEN
+            return [(text[i:i + step], self.count(text[i:i + step])) for i in range(0, len(text), step)]
+        offsets = self._tok.encode(text, add_special_tokens=False).offsets
+        pieces = []
+        for i in range(0, len(offsets), max_tokens):
+            window = offsets[i:i + max_tokens]
+            end = offsets[i + max_tokens][0] if i + max_tokens < len(offsets) else len(text)
+            pieces.append((text[window[0][0]:end].strip(), len(window)))
+        return [(p, n) for p, n in pieces if p]
+
+
+_counter: _TokenCounter | None = None
+
+
+def _get_counter() -> _TokenCounter:
+    global _counter
+    if _counter is None:
+        _counter = _TokenCounter()
+    return _counter
+
+
+def _units(text: str, counter: _TokenCounter) -> Iterator[tuple[str, int, bool, str]]:
+    """
+    Yield (text, tokens, starts_section, separator) units no longer than
+    CHUNK_TOKENS: whole paragraphs where they fit, else sentences, else
+    token-bounded pieces of an overlong sentence.
+    """
+    for paragraph in _PARAGRAPH_RE.split(text):
+        for block in _HEADING_SPLIT_RE.split(paragraph):
+            block = block.strip()
+            if not block:
+                continue
+            heading = bool(_HEADING_RE.match(block))
+            tokens = counter.count(block)
+            if tokens <= CHUNK_TOKENS:
+                yield block, tokens, heading, "\n\n"
+                continue
+            sep = "\n\n"
+            for sentence in _SENTENCE_RE.split(block):
+                sentence = sentence.strip()
+                if not sentence:
+                    continue
+                tokens = counter.count(sentence)
+                pieces = [(sentence, tokens)] if tokens <= CHUNK_TOKENS else counter.split(sentence, CHUNK_TOKENS)
+                for piece, n in pieces:
+                    yield piece, n, heading, sep
+                    heading, sep = False, " "
+
+
+def chunk_text(text: str) -> list[str]:
+    """
+    Split text into chunks of about CHUNK_TOKENS tokens along paragraph,
+    sentence and markdown-heading boundaries. A heading always starts a new
+    chunk. A unit's token count travels with it, so overlap carried into the
+    next chunk is not counted again.
+    """
+    counter = _get_counter()
+    chunks: list[str] = []
+    current: list[tuple[str, int, str]] = []
+    size = 0
+
+    def flush() -> None:
+        if current:
+            chunks.append("".join(sep + t if i else t for i, (t, _, sep) in enumerate(current)))
+
+    for unit, tokens, heading, sep in _units(text, counter):
+        if current and (heading or size + tokens > CHUNK_TOKENS):
+            flush()
+            # Carry trailing sentences over as overlap, unless a new section starts
+            carry: list[tuple[str, int, str]] = []
+            carried = 0
+            if not heading:
+                for t, n, s in reversed(current):
+                    if carried + n > CHUNK_OVERLAP_TOKENS or carried + n + tokens > CHUNK_TOKENS:
+                        break
+                    carry.insert(0, (t, n, s))
+                    carried += n
+            current, size = carry, carried
+        current.append((unit, tokens, sep))
+        size += tokens
+    flush()
+    return chunks
+
+
+def iter_chunks(
+    filepath: Path, on_page_count: Callable[[int], None] | None = None
+) -> Iterator[tuple[str, int | None]]:
+    """Stream (chunk, page number) pairs. Chunks never span PDF pages."""
+    for page, text in iter_pages(filepath, on_page_count):
+        for chunk in chunk_text(text):
+            yield chunk, page
+
+
+def extract_chunks(filepath: str) -> list[tuple[str, int | None]]:
+    """Extract and chunk one file."""
+    return list(iter_chunks(Path(filepath)))
+
+
+def file_hash(filepath: str) -> str:
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def extract_file(filepath: str) -> tuple[str, list[tuple[str, int | None]]]:
+    """Hash, extract and chunk one file. Process-pool entry point."""
+    return file_hash(filepath), extract_chunks(filepath)
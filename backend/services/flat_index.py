@@ -0,0 +1,300 @@
+"""
+Memory-mapped flat vector index.
+
+A brute-force alternative to Chroma for the documents collection. Vectors are
+unit-normalised and stored as float16, or as int8 with a float32 scale per
+row, in append-only segment files that are memory-mapped. Opening the index
+reads only the ids, and a query is a dot product over each segment. For a few
+hundred thousand 384-d chunks that is exact and fast, without a SQLite + HNSW
+stack to load.
+
+An index directory holds index.json ({dim, dtype}) and numbered segments:
+
+    seg-000001.vec   rows of dim values
+    seg-000001.scl   float32 scale per row (int8 only)
+    seg-000001.ids   one id per line, in row order
+    seg-000001.del   int32 numbers of deleted rows (tombstones)
+
+Rows are appended to the newest segment until it holds SEGMENT_ROWS. Deleting
+only appends a tombstone; a segment is rewritten without its dead rows once
+more than COMPACT_DEAD_RATIO of it is dead. Ids are written last, so a row cut
+short by a crash is ignored on the next open. If an id is live in two segments
+(a crash mid-compaction), the newer segment wins.
+"""
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from services.vector_store import VectorStore
+
+SEGMENT_ROWS = 65536
+COMPACT_DEAD_RATIO = 0.5
+QUERY_BLOCK_ROWS = 4096  # rows converted to float32 at a time while scoring; fits in cache
+DTYPES = {"float16": np.float16, "int8": np.int8}
+
+
+class _Segment:
+    def __init__(self, directory: Path, number: int, dim: int, dtype: str):
+        self.number = number
+        self.dim = dim
+        self.dtype = DTYPES[dtype]
+        stem = directory / f"seg-{number:06d}"
+        self.vec_path = stem.with_suffix(".vec")
+        self.scl_path = stem.with_suffix(".scl") if dtype == "int8" else None
+        self.ids_path = stem.with_suffix(".ids")
+        self.del_path = stem.with_suffix(".del")
+
+        self.ids: list[str] = self.ids_path.read_text().splitlines() if self.ids_path.exists() else []
+        row_bytes = dim * np.dtype(self.dtype).itemsize
+        rows = self.vec_path.stat().st_size // row_bytes if self.vec_path.exists() else 0
+        if self.scl_path is not None:
+            rows = min(rows, self.scl_path.stat().st_size // 4 if self.scl_path.exists() else 0)
+        n = min(rows, len(self.ids))
+        if n < len(self.ids) or n < rows:
+            self._truncate(n)
+        self.dead = np.zeros(n, dtype=bool)
+        if self.del_path.exists():
+            rows_deleted = np.fromfile(self.del_path, dtype=np.int32)
+            self.dead[rows_deleted[rows_deleted < n]] = True
+        self._map()
+
+    def _truncate(self, n: int) -> None:
+        """Drop rows past n left by an interrupted append."""
+        self.ids = self.ids[:n]
+        self.ids_path.write_text("".join(f"{i}\n" for i in self.ids))
+        for path, row_bytes in ((self.vec_path, self.dim * np.dtype(self.dtype).itemsize), (self.scl_path, 4)):
+            if path is not None and path.exists():
+                with open(path, "r+b") as f:
+                    f.truncate(n * row_bytes)
+
+    def _map(self) -> None:
+        n = len(self.ids)
+        if n == 0:
+            self.vecs = np.zeros((0, self.dim), dtype=self.dtype)
+            self.scales = np.zeros(0, dtype=np.float32) if self.scl_path is not None else None
+            return
+        self.vecs = np.memmap(self.vec_path, dtype=self.dtype, mode="r", shape=(n, self.dim))
+        self.scales = (
+            np.memmap(self.scl_path, dtype=np.float32, mode="r", shape=(n,))
+            if self.scl_path is not None else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def dead_count(self) -> int:
+        return int(self.dead.sum())
+
+    def append(self, ids: list[str], rows: np.ndarray, scales: np.ndarray | None) -> None:
+        with open(self.vec_path, "ab") as f:
+            f.write(np.ascontiguousarray(rows).tobytes())
+        if self.scl_path is not None:
+            with open(self.scl_path, "ab") as f:
+                f.write(scales.astype(np.float32).tobytes())
+        with open(self.ids_path, "a") as f:
+            f.write("".join(f"{i}\n" for i in ids))
+        self.ids.extend(ids)
+        # New arrays rather than in-place growth, so a query holding the old ones stays consistent
+        self.dead = np.concatenate([self.dead, np.zeros(len(ids), dtype=bool)])
+        self._map()
+
+    def delete(self, rows: list[int]) -> None:
+        with open(self.del_path, "ab") as f:
+            f.write(np.asarray(rows, dtype=np.int32).tobytes())
+        self.dead[rows] = True
+
+    def remove_files(self) -> None:
+        self.vecs = self.scales = None
+        for path in (self.vec_path, self.scl_path, self.ids_path, self.del_path):
+            if path is not None:
+                path.unlink(missing_ok=True)
+
+
+class FlatIndex(VectorStore):
+    def __init__(self, directory: Path, dtype: str = "float16", name: str = "flat"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.name = name
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.dtype = dtype
+        self.dim: int | None = None
+        self._segments: list[_Segment] = []
+        # id -> (segment, row) of its live copy
+        self._where: dict[str, tuple[_Segment, int]] = {}
+
+        meta_path = self.directory / "index.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if meta["dtype"] != dtype:
+                raise ValueError(f"{self.directory} holds {meta['dtype']} vectors, not {dtype}")
+            self.dim = meta["dim"]
+            numbers = sorted(int(p.stem.split("-")[1]) for p in self.directory.glob("seg-*.ids"))
+            for number in numbers:
+                self._load_segment(number)
+
+    def _load_segment(self, number: int) -> None:
+        seg = _Segment(self.directory, number, self.dim, self.dtype)
+        superseded: dict[_Segment, list[int]] = {}
+        for row, chunk_id in enumerate(seg.ids):
+            if seg.dead[row]:
+                continue
+            old = self._where.get(chunk_id)
+            if old is not None:
+                superseded.setdefault(old[0], []).append(old[1])
+            self._where[chunk_id] = (seg, row)
+        for old_seg, rows in superseded.items():
+            old_seg.delete(rows)
+        self._segments.append(seg)
+
+    # --- vectors --------------------------------------------------------------
+
+    @staticmethod
+    def _unit(vectors) -> np.ndarray:
+        m = np.asarray(vectors, dtype=np.float32)
+        if m.ndim == 1:
+            m = m[None, :]
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return m / norms
+
+    def _encode(self, m: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        if self.dtype == "float16":
+            return m.astype(np.float16), None
+        scales = np.abs(m).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(m / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def _decode(self, seg: _Segment, rows) -> np.ndarray:
+        m = np.asarray(seg.vecs[rows], dtype=np.float32)
+        if seg.scales is not None:
+            m = m * np.asarray(seg.scales[rows])[..., None]
+        return m
+
+    # --- VectorStore ----------------------------------------------------------
+
+    def count(self) -> int:
+        return len(self._where)
+
+    def ids(self) -> list[str]:
+        with self._lock:
+            return list(self._where)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None) -> None:
+        if not ids:
+            return
+        # Last occurrence wins within one call
+        latest = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        order = sorted(latest.values())
+        m = self._unit(embeddings)[order]
+        new_ids = [ids[i] for i in order]
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(m.shape[1])
+                (self.directory / "index.json").write_text(json.dumps({"dim": self.dim, "dtype": self.dtype}))
+            elif m.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-d vectors, got {m.shape[1]}-d")
+            self._delete_locked(new_ids)
+            rows, scales = self._encode(m)
+            start = 0
+            while start < len(new_ids):
+                seg = self._segments[-1] if self._segments and len(self._segments[-1]) < SEGMENT_ROWS else None
+                if seg is None:
+                    number = self._segments[-1].number + 1 if self._segments else 1
+                    seg = _Segment(self.directory, number, self.dim, self.dtype)
+                    self._segments.append(seg)
+                take = min(SEGMENT_ROWS - len(seg), len(new_ids) - start)
+                first = len(seg)
+                seg.append(
+                    new_ids[start:start + take],
+                    rows[start:start + take],
+                    scales[start:start + take] if scales is not None else None,
+                )
+                for k, chunk_id in enumerate(new_ids[start:start + take]):
+                    self._where[chunk_id] = (seg, first + k)
+                start += take
+
+    def delete(self, ids: list[str]) -> None:
+        with self._lock:
+            touched = self._delete_locked(ids)
+            for seg in touched:
+                if seg.dead_count() > COMPACT_DEAD_RATIO * len(seg):
+                    self._compact(seg)
+
+    def _delete_locked(self, ids: list[str]) -> set[_Segment]:
+        by_segment: dict[_Segment, list[int]] = {}
+        for chunk_id in ids:
+            where = self._where.pop(chunk_id, None)
+            if where is not None:
+                by_segment.setdefault(where[0], []).append(where[1])
+        for seg, rows in by_segment.items():
+            seg.delete(rows)
+        return set(by_segment)
+
+    def _compact(self, seg: _Segment) -> None:
+        """Rewrite seg's live rows into a new segment and drop the old files."""
+        live = np.flatnonzero(~seg.dead)
+        if len(live):
+            number = self._segments[-1].number + 1
+            fresh = _Segment(self.directory, number, self.dim, self.dtype)
+            ids = [seg.ids[r] for r in live]
+            fresh.append(ids, np.asarray(seg.vecs[live]), np.asarray(seg.scales[live]) if seg.scales is not None else None)
+            for k, chunk_id in enumerate(ids):
+                self._where[chunk_id] = (fresh, k)
+            self._segments.append(fresh)
+        self._segments.remove(seg)
+        seg.remove_files()
+
+    def query(self, embedding, n: int) -> list[str]:
+        if n <= 0 or not self._where:
+            return []
+        q = self._unit(embedding)[0]
+        with self._lock:
+            # Segment arrays are replaced, never resized, on append; a snapshot is enough
+            snapshot = [(seg, seg.vecs, seg.scales, seg.dead, seg.ids) for seg in self._segments]
+        best_scores: list[np.ndarray] = []
+        best_ids: list[str] = []
+        for seg, vecs, scales, dead, ids in snapshot:
+            rows = min(len(vecs), len(dead))
+            for start in range(0, rows, QUERY_BLOCK_ROWS):
+                end = min(start + QUERY_BLOCK_ROWS, rows)
+                scores = np.asarray(vecs[start:end], dtype=np.float32) @ q
+                if scales is not None:
+                    scores *= scales[start:end]
+                scores[dead[start:end]] = -np.inf
+                k = min(n, end - start)
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.isfinite(scores[top])]
+                best_scores.append(scores[top])
+                best_ids.extend(ids[start + i] for i in top)
+        if not best_ids:
+            return []
+        scores = np.concatenate(best_scores)
+        order = np.argsort(-scores, kind="stable")[:n]
+        return [best_ids[i] for i in order]
+
+    def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        # Decoded under the lock: compaction may drop a segment's arrays at any time
+        with self._lock:
+            return {
+                chunk_id: self._decode(*self._where[chunk_id]).tolist()
+                for chunk_id in ids if chunk_id in self._where
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = sum(len(seg) for seg in self._segments)
+            return {
+                "backend": self.name,
+                "dtype": self.dtype,
+                "dim": self.dim,
+                "segments": len(self._segments),
+                "live": len(self._where),
+                "dead": rows - len(self._where),
+                "bytes": sum(
+                    p.stat().st_size for p in self.directory.glob("seg-*") if p.exists()
+                ),
+            }
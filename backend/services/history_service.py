@@ -0,0 +1,318 @@
+"""
+Chat history store — SQLite (WAL) at ~/.manasu/history.db.
+
+Replaces the chat_sessions / chat_messages Chroma collections, which embedded
+every turn just to store it. Messages are indexed on (chat_id, timestamp) so
+loading a conversation is a range scan instead of a metadata filter + sort.
+Existing Chroma history is copied over once on first open.
+
+Recently used conversations are also kept in an in-memory LRU (updated on
+append) so building a prompt window doesn't hit the database every turn.
+"""
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from config import HISTORY_DB_PATH, HISTORY_CACHE_CHATS
+from services.token_budget import estimate_tokens
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    chat_id    TEXT PRIMARY KEY,
+    title      TEXT NOT NULL,
+    preview    TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id   TEXT NOT NULL,
+    role      TEXT NOT NULL,
+    content   TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_chat_ts ON messages (chat_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    chat_id    TEXT PRIMARY KEY,
+    summary    TEXT NOT NULL,
+    covered_id INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+# chat_id -> [{id, role, content, timestamp, tokens, offset}], most recently
+# used last. offset is the running token count before the message.
+_cache: OrderedDict[str, list[dict]] = OrderedDict()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    with _lock:
+        if _conn is None:
+            conn = sqlite3.connect(HISTORY_DB_PATH, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            _migrate_from_chroma(conn)
+            _conn = conn
+    return _conn
+
+
+def _migrate_from_chroma(conn: sqlite3.Connection) -> None:
+    """One-time copy of the legacy chat_sessions / chat_messages collections."""
+    done = conn.execute("SELECT value FROM meta WHERE key = 'chroma_migrated'").fetchone()
+    if done:
+        return
+
+    try:
+        from services.chroma_service import _get_client, get_collection
+        existing = {c if isinstance(c, str) else c.name for c in _get_client().list_collections()}
+        sessions = (
+            get_collection("chat_sessions", create=False).get(include=["metadatas"])
+            if "chat_sessions" in existing else {"ids": []}
+        )
+        messages = (
+            get_collection("chat_messages", create=False).get(include=["documents", "metadatas"])
+            if "chat_messages" in existing else {"ids": []}
+        )
+    except Exception:
+        # Chroma unavailable — try again on next start
+        return
+
+    with conn:
+        for i, chat_id in enumerate(sessions["ids"]):
+            meta = sessions["metadatas"][i] or {}
+            created = meta.get("created_at", "")
+            conn.execute(
+                "INSERT OR IGNORE INTO sessions (chat_id, title, preview, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    chat_id,
+                    meta.get("title", "Untitled"),
+                    meta.get("preview", ""),
+                    created,
+                    meta.get("updated_at", created),
+                ),
+            )
+        rows = [
+            (meta["chat_id"], meta["role"], doc or "", meta.get("timestamp", ""))
+            for doc, meta in zip(messages.get("documents") or [], messages.get("metadatas") or [])
+            if meta and "chat_id" in meta and "role" in meta
+        ]
+        rows.sort(key=lambda r: r[3])
+        conn.executemany(
+            "INSERT INTO messages (chat_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("INSERT INTO meta (key, value) VALUES ('chroma_migrated', ?)", (_now(),))
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def create_chat(title: str = "New Chat") -> str:
+    """Create a new chat session, return chat_id."""
+    chat_id = str(uuid.uuid4())
+    now = _now()
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute(
+            "INSERT INTO sessions (chat_id, title, preview, created_at, updated_at) "
+            "VALUES (?, ?, '', ?, ?)",
+            (chat_id, title, now, now),
+        )
+    return chat_id
+
+
+def save_message(chat_id: str, role: str, content: str) -> None:
+    """Append a message and update the session preview."""
+    now = _now()
+    conn = _get_conn()
+    with _lock, conn:
+        cur = conn.execute(
+            "INSERT INTO messages (chat_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+            (chat_id, role, content, now),
+        )
+        conn.execute(
+            "UPDATE sessions SET preview = ?, updated_at = ? WHERE chat_id = ?",
+            (content[:100], now, chat_id),
+        )
+        cached = _cache.get(chat_id)
+        if cached is not None:
+            offset = cached[-1]["offset"] + cached[-1]["tokens"] if cached else 0
+            cached.append({
+                "id": cur.lastrowid,
+                "role": role,
+                "content": content,
+                "timestamp": now,
+                "tokens": estimate_tokens(content),
+                "offset": offset,
+            })
+            _cache.move_to_end(chat_id)
+
+
+def _load_cached(chat_id: str) -> list[dict]:
+    """Return the cached message list for chat_id, loading it on a miss. Caller holds _lock."""
+    cached = _cache.get(chat_id)
+    if cached is not None:
+        _cache.move_to_end(chat_id)
+        return cached
+
+    rows = _conn.execute(
+        "SELECT id, role, content, timestamp FROM messages "
+        "WHERE chat_id = ? ORDER BY timestamp, id",
+        (chat_id,),
+    ).fetchall()
+    cached = []
+    offset = 0
+    for row in rows:
+        tokens = estimate_tokens(row["content"])
+        cached.append({**dict(row), "tokens": tokens, "offset": offset})
+        offset += tokens
+    _cache[chat_id] = cached
+    while len(_cache) > HISTORY_CACHE_CHATS:
+        _cache.popitem(last=False)
+    return cached
+
+
+def get_chat_messages(chat_id: str) -> list[dict]:
+    """Get all messages for a chat session, ordered by timestamp."""
+    _get_conn()
+    with _lock:
+        cached = _load_cached(chat_id)
+        return [
+            {"role": m["role"], "content": m["content"], "timestamp": m["timestamp"]}
+            for m in cached
+        ]
+
+
+def get_recent_messages(chat_id: str, max_tokens: int, keep_after: int | None = None) -> list[dict]:
+    """
+    Newest messages that fit in max_tokens, oldest first.
+
+    The window only starts on checkpoints every max_tokens/2 tokens into the
+    chat, so its first message stays put for several turns instead of sliding
+    every turn — that keeps the prompt prefix stable for Ollama's KV cache.
+    Walks back from the end, so cost depends on the window, not the chat length.
+
+    keep_after is the id of the last message the rolling summary covers, if
+    any. Later messages that fell out of the window stay in it (up to another
+    max_tokens) until the summary catches up, so no turn is in neither.
+    """
+    step = max(max_tokens // 2, 1)
+    _get_conn()
+    with _lock:
+        cached = _load_cached(chat_id)
+        start = len(cached)
+        used = 0
+        while start > 0 and used + cached[start - 1]["tokens"] <= max_tokens:
+            start -= 1
+            used += cached[start]["tokens"]
+        # Move forward to the next checkpoint (or stay at the beginning)
+        while 0 < start < len(cached) and (
+            cached[start]["offset"] // step == cached[start - 1]["offset"] // step
+        ):
+            start += 1
+        if keep_after is not None:
+            extra = 0
+            while (
+                start > 0 and cached[start - 1]["id"] > keep_after
+                and extra + cached[start - 1]["tokens"] <= max_tokens
+            ):
+                start -= 1
+                extra += cached[start]["tokens"]
+        window = [
+            {"id": m["id"], "role": m["role"], "content": m["content"]}
+            for m in cached[start:]
+        ]
+    return window
+
+
+def get_messages_between(chat_id: str, after_id: int, before_id: int) -> list[dict]:
+    """Messages with after_id < id < before_id, oldest first."""
+    _get_conn()
+    with _lock:
+        cached = _load_cached(chat_id)
+        return [
+            {"id": m["id"], "role": m["role"], "content": m["content"]}
+            for m in cached
+            if after_id < m["id"] < before_id
+        ]
+
+
+# --- rolling summaries ------------------------------------------------------
+
+def get_summary(chat_id: str) -> dict | None:
+    """Returns {summary, covered_id} — covered_id is the last message folded in."""
+    conn = _get_conn()
+    with _lock:
+        row = conn.execute(
+            "SELECT summary, covered_id FROM summaries WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def set_summary(chat_id: str, summary: str, covered_id: int) -> None:
+    """Store the running summary. No-op if the chat was deleted meanwhile."""
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute(
+            "INSERT INTO summaries (chat_id, summary, covered_id, updated_at) "
+            "SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM sessions WHERE chat_id = ?) "
+            "ON CONFLICT (chat_id) DO UPDATE SET "
+            "summary = excluded.summary, covered_id = excluded.covered_id, updated_at = excluded.updated_at",
+            (chat_id, summary, covered_id, _now(), chat_id),
+        )
+
+
+def list_sessions() -> list[dict]:
+    """List all chat sessions sorted by updated_at desc."""
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute(
+            "SELECT chat_id, title, preview, updated_at AS timestamp FROM sessions "
+            "ORDER BY updated_at DESC"
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_session(chat_id: str) -> dict | None:
+    conn = _get_conn()
+    with _lock:
+        row = conn.execute(
+            "SELECT chat_id, title, preview, updated_at AS timestamp FROM sessions WHERE chat_id = ?",
+            (chat_id,),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def delete_session(chat_id: str) -> None:
+    """Delete a chat session and all its messages."""
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+        conn.execute("DELETE FROM sessions WHERE chat_id = ?", (chat_id,))
+        conn.execute("DELETE FROM summaries WHERE chat_id = ?", (chat_id,))
+        _cache.pop(chat_id, None)
+
+
+def update_session_title(chat_id: str, title: str) -> None:
+    conn = _get_conn()
+    with _lock, conn:
+        conn.execute("UPDATE sessions SET title = ? WHERE chat_id = ?", (title, chat_id))
@@ -0,0 +1,201 @@
+"""
+Background ingestion jobs.
+
+Uploads and folder syncs are queued on a small worker pool and the endpoint
+returns a job id straight away. Progress is fanned out to any number of SSE
+subscribers, and job state is written to documents.db so a reloaded frontend
+can find running jobs again and reattach.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable
+
+from services import catalog_service
+
+# Ingestion already fans out internally (extraction pool, batched embedding);
+# running jobs one at a time keeps them from fighting over the model.
+JOB_WORKERS = 1
+PERSIST_INTERVAL = 1.0  # seconds between progress writes to the database
+
+# fn(on_progress, cancel) -> result dict
+JobFn = Callable[[Callable[[dict], None], threading.Event], dict]
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="manasu-job")
+_lock = threading.Lock()
+_jobs: dict[str, dict] = {}
+_cancel: dict[str, threading.Event] = {}
+# Each subscriber is an asyncio.Queue on the event loop that owns it; workers
+# hand events over with call_soon_threadsafe, so no thread waits per subscriber.
+_subscribers: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+_last_persist: dict[str, float] = {}
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _deliver(loop: asyncio.AbstractEventLoop, q: asyncio.Queue, event: dict | None) -> None:
+    try:
+        loop.call_soon_threadsafe(q.put_nowait, event)
+    except RuntimeError:
+        pass  # the subscriber's loop has closed
+
+
+def _publish(job_id: str, event: dict) -> None:
+    with _lock:
+        subs = list(_subscribers.get(job_id, []))
+    for loop, q in subs:
+        _deliver(loop, q, event)
+
+
+def _update(job_id: str, persist: bool = False, **changes) -> dict:
+    with _lock:
+        job = _jobs[job_id]
+        job.update(changes, updated_at=_now())
+        snapshot = dict(job)
+    now = time.monotonic()
+    if persist or now - _last_persist.get(job_id, 0) >= PERSIST_INTERVAL:
+        _last_persist[job_id] = now
+        catalog_service.save_job(snapshot)
+    return snapshot
+
+
+def submit(kind: str, target: str, fn: JobFn, on_finish: Callable[[], None] | None = None) -> dict:
+    """
+    Queue fn on the worker pool. Returns the new job. on_finish, if given, runs
+    once the job ends however it ends, including cancelled before it started.
+    """
+    job_id = str(uuid.uuid4())
+    job = {
+        "job_id": job_id,
+        "kind": kind,
+        "target": target,
+        "status": "queued",
+        "progress": {},
+        "result": None,
+        "error": None,
+        "created_at": _now(),
+        "updated_at": _now(),
+    }
+    cancel = threading.Event()
+    with _lock:
+        _jobs[job_id] = job
+        _cancel[job_id] = cancel
+    catalog_service.save_job(job)
+    snapshot = dict(job)
+    _executor.submit(_run, job_id, fn, cancel, on_finish)
+    return snapshot
+
+
+def _run(job_id: str, fn: JobFn, cancel: threading.Event, on_finish: Callable[[], None] | None = None) -> None:
+    try:
+        _run_job(job_id, fn, cancel)
+    finally:
+        if on_finish:
+            on_finish()
+
+
+def _run_job(job_id: str, fn: JobFn, cancel: threading.Event) -> None:
+    if cancel.is_set():
+        _finish(job_id, status="cancelled")
+        return
+    _update(job_id, persist=True, status="running")
+
+    def on_progress(progress: dict) -> None:
+        _update(job_id, progress=progress)
+        _publish(job_id, {"type": "progress", "job_id": job_id, "progress": progress})
+
+    try:
+        result = fn(on_progress, cancel)
+    except Exception as e:
+        if cancel.is_set():
+            _finish(job_id, status="cancelled")
+        else:
+            _finish(job_id, status="error", error=str(e))
+        return
+    _finish(job_id, status="cancelled" if result.get("cancelled") else "done", result=result)
+
+
+def _finish(job_id: str, status: str, result: dict | None = None, error: str | None = None) -> None:
+    _update(job_id, persist=True, status=status, result=result, error=error)
+    event = {"type": status, "job_id": job_id}
+    if result is not None:
+        event["result"] = result
+    if error is not None:
+        event["content"] = error
+    with _lock:
+        # Finished jobs are served from the database from here on
+        _jobs.pop(job_id, None)
+        _cancel.pop(job_id, None)
+        _last_persist.pop(job_id, None)
+        subs = _subscribers.pop(job_id, [])
+    for loop, q in subs:
+        _deliver(loop, q, event)
+        _deliver(loop, q, None)
+
+
+def get_job(job_id: str) -> dict | None:
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+    return catalog_service.get_job(job_id)
+
+
+def list_jobs(limit: int = 50) -> list[dict]:
+    jobs = {j["job_id"]: j for j in catalog_service.list_jobs(limit)}
+    with _lock:
+        # In-memory state is fresher than the throttled database copy
+        for job_id, job in _jobs.items():
+            if job_id in jobs:
+                jobs[job_id] = dict(job)
+    return sorted(jobs.values(), key=lambda j: j["created_at"], reverse=True)
+
+
+def cancel_job(job_id: str) -> bool:
+    with _lock:
+        cancel = _cancel.get(job_id)
+    if cancel is None:
+        return False
+    cancel.set()
+    return True
+
+
+def subscribe(job_id: str) -> asyncio.Queue | None:
+    """
+    Queue of events for job_id, starting with a snapshot of its current state.
+    Ends with None once the job is finished. Returns None for unknown jobs.
+    Must be called from the event loop that will read the queue.
+    """
+    loop = asyncio.get_running_loop()
+    q: asyncio.Queue = asyncio.Queue()
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            q.put_nowait({"type": "progress", "job_id": job_id, "progress": job["progress"], "status": job["status"]})
+            _subscribers.setdefault(job_id, []).append((loop, q))
+            return q
+
+    job = catalog_service.get_job(job_id)
+    if job is None:
+        return None
+    event = {"type": job["status"], "job_id": job_id}
+    if job["result"] is not None:
+        event["result"] = job["result"]
+    if job["error"] is not None:
+        event["content"] = job["error"]
+    q.put_nowait(event)
+    q.put_nowait(None)
+    return q
+
+
+def unsubscribe(job_id: str, q: asyncio.Queue) -> None:
+    with _lock:
+        subs = _subscribers.get(job_id, [])
+        subs[:] = [(loop, sub) for loop, sub in subs if sub is not q]
+        if not subs:
+            _subscribers.pop(job_id, None)
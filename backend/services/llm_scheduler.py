@@ -0,0 +1,125 @@
+"""
+Admission control for LLM calls.
+
+Every ChatOllama call goes through one scheduler: at most LLM_MAX_CONCURRENCY
+calls run against Ollama at once. The rest wait in a priority queue where
+interactive chat turns go before background work such as summarization. When
+LLM_MAX_QUEUE callers are already waiting, a new caller takes the place of the
+oldest waiter of lower priority, which is rejected; if there is none, the new
+caller is rejected straight away instead of piling up inside Ollama. A backlog
+of background work therefore never gets a chat turn turned away.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from config import LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+
+class QueueFull(Exception):
+    """Raised when the LLM queue is at capacity."""
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._waits_ms: deque[float] = deque(maxlen=256)
+        self._admitted: Counter = Counter()
+        self._rejected: Counter = Counter()
+
+    def _queued(self) -> list[int]:
+        return [p for p, _, fut in self._waiters if not fut.done()]
+
+    def _evictable(self, priority: int) -> tuple[int, int, asyncio.Future] | None:
+        """The waiter a priority caller may displace: lowest priority, then oldest."""
+        lower = [w for w in self._waiters if w[0] > priority and not w[2].done()]
+        return min(lower, key=lambda w: (-w[0], w[1])) if lower else None
+
+    def is_full(self, priority: int = INTERACTIVE) -> bool:
+        """Whether a caller of this priority would be rejected right now."""
+        return (
+            self._active >= self.max_concurrent
+            and len(self._queued()) >= self.max_queue
+            and self._evictable(priority) is None
+        )
+
+    @asynccontextmanager
+    async def slot(self, priority: int = INTERACTIVE) -> AsyncIterator[None]:
+        """Hold one of the concurrent LLM slots for the duration of the block."""
+        start = time.monotonic()
+        if self._active < self.max_concurrent and not self._queued():
+            self._active += 1
+        else:
+            if len(self._queued()) >= self.max_queue:
+                victim = self._evictable(priority)
+                if victim is None:
+                    self._rejected[priority] += 1
+                    raise QueueFull("The model is busy — too many requests are queued. Try again shortly.")
+                self._rejected[victim[0]] += 1
+                victim[2].set_exception(QueueFull("Displaced by a higher-priority request."))
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+            try:
+                await fut
+            except asyncio.CancelledError:
+                # The slot may have been handed over just before we were cancelled
+                if fut.done() and not fut.cancelled() and fut.exception() is None:
+                    self._release()
+                raise
+
+        self._admitted[priority] += 1
+        self._waits_ms.append((time.monotonic() - start) * 1000)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                # Hand the slot straight to the next waiter
+                self._active += 1
+                fut.set_result(None)
+                break
+
+    def stats(self) -> dict:
+        queued = Counter(self._queued())
+        waits = sorted(self._waits_ms)
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queued": {name: queued[p] for p, name in _PRIORITY_NAMES.items()},
+            "admitted": {name: self._admitted[p] for p, name in _PRIORITY_NAMES.items()},
+            "rejected": {name: self._rejected[p] for p, name in _PRIORITY_NAMES.items()},
+            "wait_ms": {
+                "mean": round(sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95": round(waits[max(0, int(len(waits) * 0.95) - 1)], 1) if waits else 0.0,
+                "max": round(waits[-1], 1) if waits else 0.0,
+            },
+        }
+
+
+_scheduler: LLMScheduler | None = None
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE)
+    return _scheduler
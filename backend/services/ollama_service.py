@@ -1,5 +1,6 @@
 import httpx
-from config import OLLAMA_URL, MODEL
+from config import OLLAMA_URL, MODEL, OLLAMA_KEEP_ALIVE
+from services.settings_service import get_settings
 
 
 async def check_ollama_health() -> dict:
@@ -23,3 +24,17 @@ async def check_ollama_health() -> dict:
             }
     except Exception:
         return {"running": False, "model_available": False, "model": MODEL}
+
+
+async def preload_model() -> bool:
+    """Load the configured model into Ollama so the first chat turn skips the load."""
+    s = get_settings()
+    try:
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            resp = await client.post(
+                f"{s['ollama_url']}/api/generate",
+                json={"model": s["model"], "keep_alive": OLLAMA_KEEP_ALIVE},
+            )
+            return resp.status_code == 200
+    except Exception:
+        return False
@@ -0,0 +1,136 @@
+"""
+Opt-in cache of answers to plain (untagged) questions.
+
+Keyed on model + temperature + a fingerprint of the conversation before the
+question (earlier turns and rolling summary) + normalized question, so a
+follow-up like "why?" is only answered from the same context. In "semantic"
+mode a miss on the exact key falls back to the nearest cached question asked
+in that same context by MiniLM cosine similarity, if it clears
+RESPONSE_CACHE_THRESHOLD. Entries expire after RESPONSE_CACHE_TTL seconds and
+the least recently used are evicted past RESPONSE_CACHE_SIZE. Tagged questions
+are never cached — their answer depends on live iMessage/Mail/document data.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_THRESHOLD
+
+MODES = ("off", "exact", "semantic")
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize(question: str) -> str:
+    return _WS_RE.sub(" ", question.strip().lower()).rstrip("?!. ")
+
+
+def context_fingerprint(messages: list, summary: str = "") -> str:
+    """Digest of the prompt context a question is asked in: prior messages and the summary."""
+    h = hashlib.sha256(summary.encode())
+    for message in messages:
+        h.update(b"\0" + message.type.encode() + b"\0" + str(message.content).encode())
+    return h.hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        # (model, temperature, context, normalized) -> (answer, created_at, unit embedding | None)
+        self._entries: OrderedDict[tuple, tuple[str, float, np.ndarray | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _expire(self, now: float) -> None:
+        stale = [k for k, (_, created, _) in self._entries.items() if now - created > self.ttl]
+        for k in stale:
+            del self._entries[k]
+
+    def get(
+        self, key: tuple, embed: Callable[[str], np.ndarray] | None = None
+    ) -> tuple[str | None, np.ndarray | None]:
+        """
+        Exact lookup, then nearest-neighbour lookup if embed is given. Returns
+        (answer or None, the question's embedding if one was computed), so a
+        miss can hand the embedding on to put.
+        """
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], None
+            candidates = [
+                (k, vec) for k, (_, _, vec) in self._entries.items()
+                if vec is not None and k[:-1] == key[:-1]
+            ]
+
+        query = None
+        if embed is not None and candidates:
+            query = embed(key[-1])
+            sims = np.stack([vec for _, vec in candidates]) @ query
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                with self._lock:
+                    entry = self._entries.get(candidates[best][0])
+                    if entry is not None:
+                        self._entries.move_to_end(candidates[best][0])
+                        self.hits += 1
+                        self.semantic_hits += 1
+                        return entry[0], query
+
+        with self._lock:
+            self.misses += 1
+        return None, query
+
+    def put(
+        self,
+        key: tuple,
+        answer: str,
+        embed: Callable[[str], np.ndarray] | None = None,
+        vec: np.ndarray | None = None,
+    ) -> None:
+        """Store answer. vec is the question's embedding if get already computed it."""
+        if vec is None and embed is not None:
+            vec = embed(key[-1])
+        with self._lock:
+            self._entries[key] = (answer, time.time(), vec)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_THRESHOLD)
+    return _cache
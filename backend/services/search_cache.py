@@ -0,0 +1,102 @@
+"""
+Caches in front of document search.
+
+Query embeddings are kept in an LRU keyed on the query text, so follow-ups and
+regenerations don't re-run the model. Search results are kept for
+SEARCH_RESULT_CACHE_TTL seconds keyed on (query, top_k, collection version).
+document_service bumps the version on every ingest or delete, so a cached
+result never outlives the chunks it was computed from.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from config import SEARCH_EMBED_CACHE_SIZE, SEARCH_RESULT_CACHE_SIZE, SEARCH_RESULT_CACHE_TTL
+
+
+class SearchCache:
+    def __init__(self, embed_size: int, result_size: int, result_ttl: float):
+        self.embed_size = embed_size
+        self.result_size = result_size
+        self.result_ttl = result_ttl
+        self._embeddings: OrderedDict[str, list[float]] = OrderedDict()
+        # (query, top_k, version) -> (results, created_at)
+        self._results: OrderedDict[tuple, tuple[list[dict], float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.embed_hits = 0
+        self.embed_misses = 0
+        self.result_hits = 0
+        self.result_misses = 0
+
+    def get_embedding(self, query: str) -> list[float] | None:
+        with self._lock:
+            vec = self._embeddings.get(query)
+            if vec is None:
+                self.embed_misses += 1
+                return None
+            self._embeddings.move_to_end(query)
+            self.embed_hits += 1
+            return vec
+
+    def put_embedding(self, query: str, vec: list[float]) -> None:
+        with self._lock:
+            self._embeddings[query] = vec
+            self._embeddings.move_to_end(query)
+            while len(self._embeddings) > self.embed_size:
+                self._embeddings.popitem(last=False)
+
+    def get_results(self, key: tuple) -> list[dict] | None:
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None or time.time() - entry[1] > self.result_ttl:
+                self._results.pop(key, None)
+                self.result_misses += 1
+                return None
+            self._results.move_to_end(key)
+            self.result_hits += 1
+            return [dict(r) for r in entry[0]]
+
+    def put_results(self, key: tuple, results: list[dict]) -> None:
+        with self._lock:
+            # Entries for older collection versions can never hit again
+            stale = [k for k in self._results if k[2] != key[2]]
+            for k in stale:
+                del self._results[k]
+            self._results[key] = ([dict(r) for r in results], time.time())
+            self._results.move_to_end(key)
+            while len(self._results) > self.result_size:
+                self._results.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._embeddings.clear()
+            self._results.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            embed_lookups = self.embed_hits + self.embed_misses
+            result_lookups = self.result_hits + self.result_misses
+            return {
+                "embeddings": {
+                    "entries": len(self._embeddings),
+                    "hits": self.embed_hits,
+                    "misses": self.embed_misses,
+                    "hit_rate": round(self.embed_hits / embed_lookups, 4) if embed_lookups else 0.0,
+                },
+                "results": {
+                    "entries": len(self._results),
+                    "hits": self.result_hits,
+                    "misses": self.result_misses,
+                    "hit_rate": round(self.result_hits / result_lookups, 4) if result_lookups else 0.0,
+                },
+            }
+
+
+_cache: SearchCache | None = None
+
+
+def get_search_cache() -> SearchCache:
+    global _cache
+    if _cache is None:
+        _cache = SearchCache(SEARCH_EMBED_CACHE_SIZE, SEARCH_RESULT_CACHE_SIZE, SEARCH_RESULT_CACHE_TTL)
+    return _cache
@@ -12,6 +12,21 @@ DEFAULTS: dict = {
     "temperature": 0.1,
     "model": "llama3.2",
     "ollama_url": "http://localhost:11434",
+    # Prompt budgets (approximate tokens): conversation history, and the
+    # system prompt plus injected [texts]/[emails]/[files] context.
+    "history_tokens": 2048,
+    "context_tokens": 3072,
+    # Share of context_tokens for [files] excerpts after merging and de-duplication
+    "files_tokens": 1536,
+    # Reuse answers to repeated untagged questions: "off" | "exact" | "semantic"
+    "response_cache": "off",
+    # Documents vector store: "chroma" | "flat" | "flat-int8". A change is
+    # applied by a background job that fills the new store, then switches to it.
+    "vector_store": "chroma",
+    # MiniLM inference: "torch" | "onnx" | "onnx-int8", and CPU threads for it
+    # (0 = the runtime's default). Changing either reloads the model.
+    "embedding_backend": "torch",
+    "embedding_threads": 0,
 }
 
 _cache: dict = {}
@@ -46,11 +61,15 @@ def update_settings(data: dict) -> dict:
 
 
 def _reset_llm_singletons() -> None:
-    """Force router and drafter to rebuild ChatOllama with new settings."""
+    """Force router, drafter and summarizer to rebuild ChatOllama with new settings."""
     try:
         import agents.router as router
-        router._llm_tools = None
-        router._llm_plain = None
+        router._llm = None
+    except Exception:
+        pass
+    try:
+        import agents.summarizer as summarizer
+        summarizer._llm = None
     except Exception:
         pass
     try:
@@ -0,0 +1,24 @@
+"""
+Rough token accounting for prompt budgeting.
+
+Ollama doesn't expose its tokenizer over HTTP, so we use the usual ~4 chars
+per token estimate for Llama-family models. It only needs to be close enough
+to keep prompts inside the configured budgets.
+"""
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Trim text to roughly max_tokens, cutting at a line break where possible."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return text[:cut].rstrip() + "\n…"
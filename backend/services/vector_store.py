@@ -0,0 +1,127 @@
+"""
+Vector stores for the documents collection.
+
+document_service talks to its vectors only through VectorStore, so the
+backend can be swapped without touching ingestion or search:
+
+- "chroma": the Chroma collection (SQLite + HNSW) the app has always used.
+- "flat" / "flat-int8": a memory-mapped brute-force index (see flat_index),
+  float16 or int8. Much lighter and ready as soon as it is opened. float16
+  is the more exact of the two; int8 is half the size, and also faster on
+  NumPy builds without SIMD float16 conversion.
+
+Chunk text and metadata live in the catalog (documents.db); a store only has
+to keep vectors by chunk id.
+"""
+from abc import ABC, abstractmethod
+
+BACKENDS = ("chroma", "flat", "flat-int8")
+
+
+class VectorStore(ABC):
+    name: str
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of vectors stored."""
+
+    @abstractmethod
+    def ids(self) -> list[str]:
+        """Every stored id."""
+
+    @abstractmethod
+    def upsert(self, ids: list[str], embeddings: list, documents: list[str], metadatas: list[dict]) -> None:
+        """Store vectors, replacing any stored under the same ids. Backends may ignore documents/metadatas."""
+
+    @abstractmethod
+    def delete(self, ids: list[str]) -> None:
+        """Remove ids. Unknown ids are ignored."""
+
+    @abstractmethod
+    def query(self, embedding: list[float], n: int) -> list[str]:
+        """Ids of the n stored vectors nearest to embedding, nearest first."""
+
+    @abstractmethod
+    def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        """Stored vectors for those of ids that exist."""
+
+    def max_batch_size(self) -> int:
+        """Largest upsert the backend accepts at once."""
+        return 1 << 30
+
+
+class ChromaStore(VectorStore):
+    name = "chroma"
+
+    def __init__(self, client, collection):
+        self.client = client
+        self.collection = collection
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def ids(self) -> list[str]:
+        return self.collection.get(include=[])["ids"]
+
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def delete(self, ids: list[str]) -> None:
+        self.collection.delete(ids=ids)
+
+    def query(self, embedding: list[float], n: int) -> list[str]:
+        n = min(n, self.count())
+        if n == 0:
+            return []
+        results = self.collection.query(query_embeddings=[embedding], n_results=n, include=[])
+        return results["ids"][0]
+
+    def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        stored = self.collection.get(ids=ids, include=["embeddings"])
+        return dict(zip(stored["ids"], stored["embeddings"]))
+
+    def get_all(self) -> dict:
+        """Every chunk with its text and metadata, for rebuilding the catalog."""
+        return self.collection.get(include=["documents", "metadatas"])
+
+    def max_batch_size(self) -> int:
+        return self.client.get_max_batch_size()
+
+
+def open_store(backend: str) -> VectorStore:
+    """The documents collection in the given backend, created if it doesn't exist."""
+    if backend == "chroma":
+        from services.chroma_service import _get_client, get_collection
+
+        return ChromaStore(_get_client(), get_collection("documents"))
+    if backend in ("flat", "flat-int8"):
+        from config import FLAT_INDEX_DIR
+        from services.flat_index import FlatIndex
+
+        dtype = "int8" if backend == "flat-int8" else "float16"
+        return FlatIndex(FLAT_INDEX_DIR / f"documents-{dtype}", dtype=dtype, name=backend)
+    raise ValueError(f"Unknown vector store: {backend}")
+
+
+def existing_stores(exclude: str) -> list[VectorStore]:
+    """Other backends that already hold a documents collection, e.g. to copy vectors from."""
+    from config import CHROMA_DIR, FLAT_INDEX_DIR
+
+    stores: list[VectorStore] = []
+    for backend in BACKENDS:
+        if backend == exclude:
+            continue
+        if backend == "chroma":
+            if not (CHROMA_DIR / "chroma.sqlite3").exists():
+                continue
+            from services.chroma_service import _get_client
+
+            names = {c if isinstance(c, str) else c.name for c in _get_client().list_collections()}
+            if "documents" not in names:
+                continue
+        else:
+            dtype = "int8" if backend == "flat-int8" else "float16"
+            if not (FLAT_INDEX_DIR / f"documents-{dtype}" / "index.json").exists():
+                continue
+        stores.append(open_store(backend))
+    return stores
@@ -0,0 +1,194 @@
+"""
+Live folder watching.
+
+Registered watch folders are kept in sync without anyone calling
+/documents/sync-folder. A watchdog observer (inotify on Linux, FSEvents on
+macOS) reports create/modify/delete/rename events, which are collected per
+folder and flushed once the folder has been quiet for WATCH_DEBOUNCE_SECONDS,
+or WATCH_MAX_DELAY_SECONDS after the first event so a steady trickle of writes
+still gets indexed.
+
+A flush queues one incremental sync job limited to the paths that changed.
+A burst such as a git checkout of thousands of files becomes a single job,
+where the files are extracted in parallel and their chunks embedded in bulk
+batches.
+
+Folders are stored in documents.db. They are watched again at startup, with a
+full sync to catch up on anything that changed while the backend was down.
+"""
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from services import catalog_service, document_service, job_service
+from services.extraction import SUPPORTED_EXTENSIONS
+
+WATCH_DEBOUNCE_SECONDS = 2.0  # quiet period before a folder's changes are synced
+WATCH_MAX_DELAY_SECONDS = 30.0  # sync anyway this long after the first unsynced change
+
+_lock = threading.Condition()
+_observer: Observer | None = None
+_flusher: threading.Thread | None = None
+_watches: dict[str, object] = {}  # folder → watchdog ObservedWatch
+_pending: dict[str, set[str]] = {}  # folder → changed paths
+_first_event: dict[str, float] = {}
+_last_event: dict[str, float] = {}
+_stats = {"events": 0, "syncs": 0}
+
+
+class _Handler(FileSystemEventHandler):
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type not in ("created", "modified", "deleted", "moved"):
+            return
+        if event.is_directory and event.event_type == "modified":
+            return  # a child changed; that child gets its own event
+        paths = [event.src_path]
+        if event.event_type == "moved":
+            paths.append(event.dest_path)
+        paths = [
+            str(p) for p in paths
+            if event.is_directory or Path(str(p)).suffix.lower() in SUPPORTED_EXTENSIONS
+        ]
+        if paths:
+            _record(self.folder, paths)
+
+
+def _record(folder: str, paths: list[str]) -> None:
+    now = time.monotonic()
+    with _lock:
+        _pending.setdefault(folder, set()).update(paths)
+        _first_event.setdefault(folder, now)
+        _last_event[folder] = now
+        _stats["events"] += 1
+        _lock.notify()
+
+
+def _due(now: float) -> tuple[list[tuple[str, set[str]]], float | None]:
+    """Pop folders ready to sync. Returns (due, seconds until the next one is)."""
+    due, wait = [], None
+    for folder in list(_pending):
+        ready_at = min(_last_event[folder] + WATCH_DEBOUNCE_SECONDS, _first_event[folder] + WATCH_MAX_DELAY_SECONDS)
+        if ready_at <= now:
+            due.append((folder, _pending.pop(folder)))
+            _first_event.pop(folder)
+            _last_event.pop(folder)
+        else:
+            wait = ready_at - now if wait is None else min(wait, ready_at - now)
+    return due, wait
+
+
+def _run_flusher() -> None:
+    while True:
+        with _lock:
+            due, wait = _due(time.monotonic())
+            while not due:
+                _lock.wait(wait)
+                due, wait = _due(time.monotonic())
+        for folder, paths in due:
+            _sync(folder, sorted(paths))
+
+
+def _sync(folder: str, paths: list[str] | None = None) -> dict:
+    """Queue an incremental sync of folder, limited to paths if given. Returns the job."""
+    def run(on_progress, cancel):
+        return document_service.ingest_folder(folder, on_progress=on_progress, cancel=cancel, paths=paths)
+
+    _stats["syncs"] += 1
+    return job_service.submit("watch", folder, run)
+
+
+def _ensure_started() -> Observer:
+    global _observer, _flusher
+    with _lock:
+        if _observer is None:
+            _observer = Observer()
+            _observer.daemon = True
+            _observer.start()
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run_flusher, name="manasu-watch", daemon=True)
+            _flusher.start()
+    return _observer
+
+
+def _schedule(folder: str) -> None:
+    observer = _ensure_started()
+    with _lock:
+        if folder not in _watches:
+            _watches[folder] = observer.schedule(_Handler(folder), folder, recursive=True)
+
+
+def add_folder(folder_path: str) -> dict:
+    """
+    Register folder_path, start watching it and queue a full sync.
+    Returns {folder, job}. Raises ValueError if it is not a directory.
+    """
+    folder = Path(folder_path).expanduser().resolve()
+    if not folder.is_dir():
+        raise ValueError(f"Not a directory: {folder}")
+    path = str(folder)
+    catalog_service.add_watch_folder(path, datetime.utcnow().isoformat())
+    _schedule(path)
+    return {"folder": path, "job": _sync(path)}
+
+
+def remove_folder(folder_path: str) -> bool:
+    """Stop watching folder_path. Its documents stay indexed. Returns False if it wasn't watched."""
+    path = str(Path(folder_path).expanduser().resolve())
+    removed = catalog_service.remove_watch_folder(path)
+    with _lock:
+        watch = _watches.pop(path, None)
+        _pending.pop(path, None)
+        _first_event.pop(path, None)
+        _last_event.pop(path, None)
+    if watch is not None and _observer is not None:
+        _observer.unschedule(watch)
+    return removed or watch is not None
+
+
+def list_folders() -> list[dict]:
+    with _lock:
+        watching = set(_watches)
+        pending = {folder: len(paths) for folder, paths in _pending.items()}
+    return [
+        {**row, "watching": row["path"] in watching, "pending_changes": pending.get(row["path"], 0)}
+        for row in catalog_service.list_watch_folders()
+    ]
+
+
+def start() -> None:
+    """Watch every registered folder and queue a catch-up sync for each."""
+    for row in catalog_service.list_watch_folders():
+        path = row["path"]
+        if not Path(path).is_dir():
+            continue  # unmounted or deleted; left registered in case it comes back
+        try:
+            _schedule(path)
+        except OSError:
+            continue  # e.g. inotify watch limit reached
+        _sync(path)
+
+
+def stop() -> None:
+    global _observer
+    with _lock:
+        observer, _observer = _observer, None
+        _watches.clear()
+    if observer is not None:
+        observer.stop()
+        observer.join(timeout=5)
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "folders": len(_watches),
+            "pending_changes": sum(len(p) for p in _pending.values()),
+            **_stats,
+        }
@@ -1,10 +1,17 @@
-import { useRef, useState, useCallback } from "react";
-import type { ConnectorStatus, DocumentItem } from "../types";
+import { useRef, useState, useCallback, useEffect } from "react";
+import type { ConnectorStatus, DocumentItem, JobEvent, JobProgress, WatchFolder } from "../types";
 import {
   fetchDocuments,
   uploadDocument,
   deleteDocument,
   syncFolder,
+  fetchWatchFolders,
+  watchFolder,
+  unwatchFolder,
+  fetchJobs,
+  cancelJob,
+  waitForJob,
+  type FolderSyncResult,
 } from "../services/api";
 
 interface Props {
@@ -53,6 +60,29 @@ function StatusRow({
   );
 }
 
+function describeProgress(p: JobProgress): string {
+  const parts: string[] = [];
+  if (p.files_total) parts.push(`${p.files_done ?? 0}/${p.files_total} files`);
+  if (p.pages_total) parts.push(`${p.pages_done ?? 0}/${p.pages_total} pages`);
+  if (p.chunks_total) parts.push(`${p.chunks_processed ?? 0}/${p.chunks_total} chunks`);
+  else if (p.chunks_processed) parts.push(`${p.chunks_processed} chunks`);
+  return parts.join(", ");
+}
+
+function describeSync(res: FolderSyncResult): string {
+  const errDetail = res.errors.map((e) => `${e.file}: ${e.error}`).join("; ");
+  return `Added ${res.added}, updated ${res.updated}, removed ${res.removed}, unchanged ${res.unchanged}, skipped ${res.skipped}${
+    res.errors.length ? ` — Errors: ${errDetail}` : ""
+  }.`;
+}
+
+function jobFailure(event: JobEvent): string | null {
+  if (event.type === "error") return event.content;
+  if (event.type === "cancelled") return "Cancelled.";
+  if (event.type === "interrupted") return "Interrupted by a server restart.";
+  return null;
+}
+
 function TrashIcon() {
   return (
     <svg width="14" height="14" viewBox="0 0 24 24" fill="currentColor">
@@ -74,6 +104,9 @@ export function ConnectorsModal({ status, onClose, onRefresh, loading }: Props)
   const [syncResult, setSyncResult] = useState<string>("");
   const [syncLoading, setSyncLoading] = useState(false);
   const [deletingId, setDeletingId] = useState<string | null>(null);
+  const [jobProgress, setJobProgress] = useState("");
+  const [activeJobId, setActiveJobId] = useState<string | null>(null);
+  const [watched, setWatched] = useState<WatchFolder[]>([]);
 
   const loadDocs = useCallback(async () => {
     setDocsLoading(true);
@@ -95,7 +128,13 @@ export function ConnectorsModal({ status, onClose, onRefresh, loading }: Props)
     setDocsLoading(true);
     try {
       for (const file of files) {
-        await uploadDocument(file);
+        const job = await uploadDocument(file);
+        setActiveJobId(job.job_id);
+        const event = await waitForJob(job.job_id, (p) =>
+          setJobProgress(`Indexing ${file.name}: ${describeProgress(p)}`)
+        );
+        const failure = jobFailure(event);
+        if (failure) throw new Error(`${file.name}: ${failure}`);
       }
       await loadDocs();
       onRefresh();
@@ -103,6 +142,8 @@ export function ConnectorsModal({ status, onClose, onRefresh, loading }: Props)
       setUploadError(err instanceof Error ? err.message : "Upload failed.");
     } finally {
       setDocsLoading(false);
+      setJobProgress("");
+      setActiveJobId(null);
       if (fileInputRef.current) fileInputRef.current.value = "";
     }
   };
@@ -113,22 +154,100 @@ export function ConnectorsModal({ status, onClose, onRefresh, loading }: Props)
     setSyncResult("");
     setUploadError("");
     try {
-      const res = await syncFolder(folderPath.trim());
-      const errDetail = res.errors.map((e) => `${e.file}: ${e.error}`).join("; ");
-      setSyncResult(
-        `Indexed ${res.indexed} file(s), skipped ${res.skipped}${
-          res.errors.length ? ` — Errors: ${errDetail}` : ""
-        }.`
+      const job = await syncFolder(folderPath.trim());
+      setActiveJobId(job.job_id);
+      const event = await waitForJob(job.job_id, (p) =>
+        setJobProgress(`Syncing: ${describeProgress(p)}`)
       );
+      const failure = jobFailure(event);
+      if (failure) throw new Error(failure);
+      if (event.type === "done") setSyncResult(describeSync(event.result as unknown as FolderSyncResult));
       await loadDocs();
       onRefresh();
     } catch (err: unknown) {
       setUploadError(err instanceof Error ? err.message : "Sync failed.");
     } finally {
       setSyncLoading(false);
+      setJobProgress("");
+      setActiveJobId(null);
+    }
+  };
+
+  const handleWatch = async () => {
+    if (!folderPath.trim()) return;
+    setSyncLoading(true);
+    setSyncResult("");
+    setUploadError("");
+    try {
+      const { job } = await watchFolder(folderPath.trim());
+      setWatched(await fetchWatchFolders());
+      setActiveJobId(job.job_id);
+      const event = await waitForJob(job.job_id, (p) =>
+        setJobProgress(`Syncing: ${describeProgress(p)}`)
+      );
+      const failure = jobFailure(event);
+      if (failure) throw new Error(failure);
+      if (event.type === "done") setSyncResult(describeSync(event.result as unknown as FolderSyncResult));
+      await loadDocs();
+      onRefresh();
+    } catch (err: unknown) {
+      setUploadError(err instanceof Error ? err.message : "Watch failed.");
+    } finally {
+      setSyncLoading(false);
+      setJobProgress("");
+      setActiveJobId(null);
     }
   };
 
+  const handleCancelJob = async () => {
+    if (!activeJobId) return;
+    try {
+      await cancelJob(activeJobId);
+    } catch {
+      // The job finished before the request arrived
+    }
+  };
+
+  const handleUnwatch = async (path: string) => {
+    try {
+      await unwatchFolder(path);
+      setWatched((prev) => prev.filter((w) => w.path !== path));
+    } catch {
+      setUploadError("Failed to stop watching folder.");
+    }
+  };
+
+  useEffect(() => {
+    fetchWatchFolders().then(setWatched).catch(() => { /* ignore */ });
+  }, []);
+
+  // Reattach to jobs that were still running when the page was last closed
+  useEffect(() => {
+    let active = true;
+    fetchJobs()
+      .then(async (jobs) => {
+        const running = jobs.filter((j) => j.status === "queued" || j.status === "running");
+        for (const job of running) {
+          if (!active) return;
+          setActiveJobId(job.job_id);
+          await waitForJob(job.job_id, (p) => {
+            if (active) setJobProgress(`Indexing ${job.target}: ${describeProgress(p)}`);
+          });
+        }
+        if (running.length && active) {
+          setJobProgress("");
+          setActiveJobId(null);
+          await loadDocs();
+          onRefresh();
+        }
+      })
+      .catch(() => { /* ignore */ });
+    return () => {
+      active = false;
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
   const handleDelete = async (docId: string) => {
     setDeletingId(docId);
     try {
@@ -231,6 +350,10 @@ export function ConnectorsModal({ status, onClose, onRefresh, loading }: Props)
                 <p className="text-white text-base font-medium">Documents (RAG)</p>
                 <p className="text-[#9ca3af] text-sm mt-0.5">
                   {docsIndexed} document{docsIndexed !== 1 ? "s" : ""} indexed
+                  {status.embeddings && !status.embeddings.ready &&
+                    (status.embeddings.status === "error"
+                      ? " · embedding model failed to load"
+                      : " · embedding model loading…")}
                 </p>
               </div>
             </div>
@@ -285,8 +408,57 @@ export function ConnectorsModal({ status, onClose, onRefresh, loading }: Props)
               >
                 {syncLoading ? "Syncing…" : "Sync"}
               </button>
+              <button
+                onClick={handleWatch}
+                disabled={syncLoading || !folderPath.trim()}
+                className="px-4 py-3 rounded-lg bg-[#404040] text-white text-sm
+                  font-medium hover:bg-[#525252] transition-colors disabled:opacity-50"
+                title="Sync now and keep the folder in sync as files change"
+              >
+                Watch
+              </button>
             </div>
 
+            {/* Watched folders */}
+            {watched.length > 0 && (
+              <div className="space-y-1">
+                {watched.map((w) => (
+                  <div
+                    key={w.path}
+                    className="flex items-center justify-between px-3 py-1.5
+                      rounded-lg hover:bg-[#1f1f1f] group"
+                  >
+                    <p className="text-[#9ca3af] text-xs truncate min-w-0 flex-1">
+                      Watching {w.path}
+                      {w.pending_changes > 0 && ` — ${w.pending_changes} pending`}
+                    </p>
+                    <button
+                      onClick={() => handleUnwatch(w.path)}
+                      className="ml-2 text-[#9ca3af] hover:text-[#ef4444]
+                        transition-colors flex-shrink-0"
+                      title="Stop watching (keeps indexed documents)"
+                    >
+                      <TrashIcon />
+                    </button>
+                  </div>
+                ))}
+              </div>
+            )}
+
+            {jobProgress && (
+              <div className="flex items-center justify-between gap-2">
+                <p className="text-[#9ca3af] text-sm min-w-0 flex-1">{jobProgress}</p>
+                {activeJobId && (
+                  <button
+                    onClick={handleCancelJob}
+                    className="text-[#9ca3af] text-xs hover:text-[#ef4444]
+                      transition-colors flex-shrink-0"
+                  >
+                    Cancel
+                  </button>
+                )}
+              </div>
+            )}
             {syncResult && (
               <p className="text-[#22c55e] text-sm">{syncResult}</p>
             )}
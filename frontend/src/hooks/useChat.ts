@@ -132,7 +132,9 @@ export function useChat() {
                 : m
             )
           );
-        } else if (event.type === "done") {
+        } else if (event.type === "done" || event.type === "cancelled") {
+          // "cancelled": a newer message on this chat (e.g. from another tab)
+          // preempted the answer; what arrived so far was saved as the reply
           setMessages((prev) =>
             prev.map((m) =>
               m.id === assistantMsgId ? { ...m, isStreaming: false } : m
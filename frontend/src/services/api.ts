@@ -1,5 +1,15 @@
 import axios from "axios";
-import type { ChatSession, ConnectorStatus, StreamEvent, Message, DocumentItem } from "../types";
+import type {
+  ChatSession,
+  ConnectorStatus,
+  StreamEvent,
+  Message,
+  DocumentItem,
+  IngestJob,
+  JobEvent,
+  JobProgress,
+  WatchFolder,
+} from "../types";
 
 const BASE_URL = "http://localhost:8000";
 
@@ -114,12 +124,10 @@ export async function fetchDocuments(): Promise<DocumentItem[]> {
   return res.data;
 }
 
-export async function uploadDocument(
-  file: File
-): Promise<{ doc_id: string; filename: string; chunk_count: number }> {
+export async function uploadDocument(file: File): Promise<IngestJob> {
   const form = new FormData();
   form.append("file", file);
-  const res = await api.post("/documents/upload", form, {
+  const res = await api.post<IngestJob>("/documents/upload", form, {
     headers: { "Content-Type": "multipart/form-data" },
   });
   return res.data;
@@ -129,13 +137,75 @@ export async function deleteDocument(docId: string): Promise<void> {
   await api.delete(`/documents/${docId}`);
 }
 
-export async function syncFolder(
-  folderPath: string
-): Promise<{ indexed: number; skipped: number; errors: Array<{ file: string; error: string }> }> {
-  const res = await api.post("/documents/sync-folder", { folder_path: folderPath });
+export interface FolderSyncResult {
+  added: number;
+  updated: number;
+  removed: number;
+  unchanged: number;
+  skipped: number;
+  errors: Array<{ file: string; error: string }>;
+}
+
+export async function syncFolder(folderPath: string): Promise<IngestJob> {
+  const res = await api.post<IngestJob>("/documents/sync-folder", { folder_path: folderPath });
+  return res.data;
+}
+
+export async function fetchWatchFolders(): Promise<WatchFolder[]> {
+  const res = await api.get<{ folders: WatchFolder[] }>("/watch-folders");
+  return res.data.folders;
+}
+
+/** Keep a folder in sync as files change. Returns the job for its first full sync. */
+export async function watchFolder(folderPath: string): Promise<{ folder: string; job: IngestJob }> {
+  const res = await api.post("/watch-folders", { folder_path: folderPath });
   return res.data;
 }
 
+export async function unwatchFolder(folderPath: string): Promise<void> {
+  await api.delete("/watch-folders", { params: { path: folderPath } });
+}
+
+// ── Ingestion jobs ────────────────────────────────────────────────────────────
+
+export async function fetchJobs(): Promise<IngestJob[]> {
+  const res = await api.get<IngestJob[]>("/jobs");
+  return res.data;
+}
+
+export async function cancelJob(jobId: string): Promise<void> {
+  await api.post(`/jobs/${jobId}/cancel`);
+}
+
+/** Follow a job over SSE until it finishes. Resolves with the final event. */
+export function waitForJob(
+  jobId: string,
+  onProgress: (progress: JobProgress) => void
+): Promise<JobEvent> {
+  return fetch(`${BASE_URL}/jobs/${jobId}/events`).then(async (res) => {
+    const reader = res.body?.getReader();
+    if (!reader) throw new Error("No event stream");
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split("\n");
+      buffer = lines.pop() ?? "";
+      for (const line of lines) {
+        if (!line.startsWith("data: ")) continue;
+        try {
+          const event = JSON.parse(line.slice(6)) as JobEvent;
+          if (event.type === "progress") onProgress(event.progress);
+          else return event;
+        } catch { /* ignore */ }
+      }
+    }
+    throw new Error("Job stream ended unexpectedly");
+  });
+}
+
 // ── Training API ──────────────────────────────────────────────────────────────
 
 export interface TrainingCounts {
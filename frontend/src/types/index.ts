@@ -22,7 +22,19 @@ export interface ConnectorStatus {
   };
   imessage: boolean;
   mail: boolean;
-  documents: { indexed: number; available: boolean };
+  documents: {
+    indexed: number;
+    available: boolean;
+    chunks?: { unique: number; references: number };
+  };
+  embeddings?: {
+    ready: boolean;
+    status: "not_loaded" | "loading" | "ready" | "error";
+    load_seconds: number | null;
+    error: string | null;
+    backend: "torch" | "onnx" | "onnx-int8" | null;
+    threads: number | null;
+  };
   model: string;
 }
 
@@ -33,8 +45,44 @@ export interface DocumentItem {
   upload_date: string;
 }
 
+export type JobProgress = Partial<{
+  files_total: number;
+  files_done: number;
+  chunks_total: number;
+  chunks_processed: number;
+  pages_total: number;
+  pages_done: number;
+  errors: number;
+}>;
+
+export interface IngestJob {
+  job_id: string;
+  kind: "upload" | "sync" | "watch" | "vector_store";
+  target: string;
+  status: "queued" | "running" | "done" | "error" | "cancelled" | "interrupted";
+  progress: JobProgress;
+  result: Record<string, unknown> | null;
+  error: string | null;
+  created_at: string;
+  updated_at: string;
+}
+
+export interface WatchFolder {
+  path: string;
+  added_at: string;
+  watching: boolean;
+  pending_changes: number;
+}
+
+export type JobEvent =
+  | { type: "progress"; job_id: string; progress: JobProgress }
+  | { type: "done"; job_id: string; result: Record<string, unknown> }
+  | { type: "error"; job_id: string; content: string }
+  | { type: "cancelled" | "interrupted"; job_id: string };
+
 export type StreamEvent =
   | { type: "status"; content: string }
   | { type: "token"; content: string }
   | { type: "done"; chat_id: string }
+  | { type: "cancelled"; chat_id: string }
   | { type: "error"; content: string };